@@ -0,0 +1,712 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides benchmarks for measuring the performance of different parts of the chess ai
+#
+import argparse
+import concurrent.futures
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import sys
+import time
+import zlib
+import chess
+import chess.polyglot
+import chess.syzygy
+import numpy as np
+import pandas as pd
+import misc.history_store as HistoryStore
+import misc.ai_evaluation_lib as EvaluationLib
+import misc.batch_evaluation as BatchEvaluation
+import misc.tablebase as Tablebase
+from player import ai, api
+
+HISTORY_SIZES = [1000, 10000, 100000]
+HISTORY_GAMES = 5
+HISTORY_GAME_LENGTH = 80
+
+SEARCH_POSITIONS = [
+    "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+    "r1bq1rk1/pp2bppp/2n2n2/3p4/3P4/2NBBN2/PP3PPP/R2QK2R b KQ - 0 9",
+    "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+]
+SEARCH_DIFFICULTY = 1
+SEARCH_DEPTH = 4
+WORKER_COUNTS = [1, 2, 4, 8, 16]
+HELPER_COUNTS = [0, 1, 2, 4]
+SMP_TIME_LIMIT = 10
+SMP_MAX_DEPTH = 64
+# name, null move pruning, late move reductions
+PRUNING_FEATURES = [
+    ("none", False, False),
+    ("null move", True, False),
+    ("lmr", False, True),
+    ("both", True, True)
+]
+PRUNING_TIME_LIMIT = 10
+PRUNING_DIFFICULTY = 3
+EVALUATION_POSITIONS = 10000
+EVALUATION_GAME_LENGTH = 120
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+STARTUP_RUNS = 5
+STARTUP_ENDGAME = "8/8/8/8/8/2k5/8/KQ6 w - - 0 1"
+SERVER_CLIENTS = 8
+SERVER_REQUESTS = 64
+SERVER_MOVE_TIME = 0.5
+# file operations of compact_history after which a crash is simulated: the history file, the binary index or the journal is not replaced or removed
+RECOVERY_CRASH_POINTS = ["history", "index", "journal"]
+RECOVERY_GAMES = 5
+# pieces of the won endgames played out by the tablebase, white has to win them
+CONVERSION_ENDGAMES = ["KPk", "KPkp", "KRPk"]
+CONVERSION_GAMES = 40
+CONVERSION_MAX_PLIES = 400
+BENCH_POSITIONS_LOC = "res/bench/bench.epd"
+BENCH_DIFFICULTIES = [1, 2, 3]
+# depth of the fixed depth searches per difficulty
+BENCH_DEPTHS = {1: 4, 2: 3, 3: 3}
+BENCH_TIME_LIMIT = 1
+
+
+def rewrite_history(history_location, turn_list, victory_status):
+    '''
+    former ChessMaster.groom_board_history: reads, merges and rewrites the whole history file after every game
+    '''
+    new_turn_dict = dict.fromkeys(turn_list, victory_status)
+    history = pd.read_csv(history_location)
+    history_dict = dict(zip(list(history.board), list(history.value)))
+    merged_history_dict = { k: new_turn_dict.get(k, 0) + history_dict.get(k, 0) for k in set(new_turn_dict) | set(history_dict) }
+    merged_history = pd.DataFrame(list(merged_history_dict.items()), columns=['board','value'])
+    merged_history.to_csv(history_location)
+
+
+def get_attacked_pieces_value_by_color(board, attacker_color, defender_color):
+    '''
+    former EvaluationLib.get_attacked_pieces_value_by_color: checks every square for an attacked piece of the defender
+    '''
+    attacked_squares = filter(lambda square: board.is_attacked_by(attacker_color, square) and not board.piece_at(
+        square) is None and board.piece_at(square).color is defender_color, chess.SQUARES)
+    attacked_pieces = map(lambda square: board.piece_at(square).piece_type, attacked_squares)
+    return sum(map(EvaluationLib.assign_piece_value, attacked_pieces))
+
+
+def calculate_king_zone_safety(board, color):
+    '''
+    former EvaluationLib.calculate_king_zone_safety: searches the king and collects the attackers of every square of its zone
+    '''
+    attacker_color = chess.WHITE if color == chess.BLACK else chess.BLACK
+    king_rank, king_file = next((rank, file) for rank in range(0,8) for file in range(0,8)
+        if board.piece_at(chess.square(file, rank)) == chess.Piece(chess.KING, color))
+    king_zone = chess.SquareSet()
+    rank_range = range(0,4) if color == chess.WHITE else range(-3, 1)
+    for rank_summand in rank_range:
+        if (king_rank + rank_summand) in range(0, 8):
+            for file_summand in range(-1, 2):
+                if (king_file + file_summand) in range (0,8):
+                    king_zone.add(chess.square(king_file + file_summand, king_rank + rank_summand))
+
+    attackers = {}
+    for square in king_zone:
+        for attacker_square in board.attackers(attacker_color, square):
+            attacker_piece = board.piece_at(attacker_square)
+            if not (attacker_piece.piece_type is chess.PAWN or attacker_piece.piece_type is chess.KING):
+                attackers[attacker_piece] = attackers.get(attacker_piece, 0) + 1
+    attack_weight = EvaluationLib.get_king_attack_weight(len(attackers))
+    value_of_attack = sum(EvaluationLib.get_king_attack_constants(attacker.piece_type) for attacker in attackers)
+    return -1 * (value_of_attack * attack_weight) / 1000
+
+
+def calculate_mobility_value(board, color):
+    '''
+    former EvaluationLib.calculate_mobility_value: counts the legal moves of the side to move
+    and the legal moves of the other side after the first legal move
+    '''
+    player = chess.WHITE if bool(board.turn) else chess.BLACK
+    current_turn_len = len(list(board.legal_moves))
+    if current_turn_len > 0:
+        tmp_board = chess.Board(str(board.fen()))
+        tmp_board.push(list(board.legal_moves)[0])
+        next_turn_len = len(list(tmp_board.legal_moves))
+    else:
+        next_turn_len = 0
+    if player == color:
+        return (current_turn_len - next_turn_len) / 10
+    else:
+        return (next_turn_len - current_turn_len) / 10
+
+
+def get_filler_placement(num):
+    '''
+    returns a piece placement (first part of a fen string) per number, used to fill histories of given size
+    '''
+    board = chess.BaseBoard(None)
+    board.set_piece_at(num % 64, chess.Piece(chess.KING, chess.WHITE))
+    board.set_piece_at(num // 64 % 64, chess.Piece(chess.KING, chess.BLACK))
+    board.set_piece_at(num // 4096 % 64, chess.Piece(chess.QUEEN, chess.WHITE))
+    return board.board_fen()
+
+
+def get_random_boards(num_boards, game_length):
+    '''
+    returns list of boards of random games, every position of a game is used
+    '''
+    boards = []
+    while len(boards) < num_boards:
+        board = chess.Board()
+        while len(boards) < num_boards and board.ply() < game_length and not board.is_game_over():
+            board.push(random.choice(list(board.legal_moves)))
+            boards.append(board.copy(stack=False))
+    return boards
+
+
+def get_random_game(game_length):
+    '''
+    returns list of board placements of a random game
+    '''
+    board = chess.Board()
+    turn_list = []
+    while len(turn_list) < game_length and not board.is_game_over():
+        board.push(random.choice(list(board.legal_moves)))
+        turn_list.append(board.board_fen())
+    return turn_list
+
+
+def benchmark_history(args):
+    '''
+    measures the costs of writing one game into histories of different sizes
+    compares rewriting the whole history file with appending to the journal, also while the journal is merged into the history file
+    and measures the first lookup of a reader after the compaction
+    '''
+    games = [get_random_game(HISTORY_GAME_LENGTH) for _ in range(args.games)]
+    print("{:>10} {:>16} {:>16} {:>26} {:>16} {:>16}".format("history", "rewrite (ms)", "append (ms)", "append compacting (ms)", "compaction (ms)",
+        "reload (ms)"))
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history_location = os.path.join(tmp_dir, "history.csv")
+            filler = pd.DataFrame({'board': [get_filler_placement(i) for i in range(size)], 'value': [1] * size})
+
+            filler.to_csv(history_location)
+            start = time.perf_counter()
+            for turn_list in games:
+                rewrite_history(history_location, turn_list, 1)
+            rewrite_time = (time.perf_counter() - start) / len(games)
+
+            filler.to_csv(history_location, index=False)
+            start = time.perf_counter()
+            for turn_list in games:
+                HistoryStore.append_game(turn_list, 1, history_location)
+            append_time = (time.perf_counter() - start) / len(games)
+
+            # the journal of the appends above is merged by another thread, while the same games are appended again
+            compaction = threading.Thread(target=HistoryStore.compact_history, args=(history_location,))
+            start = time.perf_counter()
+            compaction.start()
+            for turn_list in games:
+                HistoryStore.append_game(turn_list, 1, history_location)
+            compacting_append_time = (time.perf_counter() - start) / len(games)
+            compaction.join()
+            compaction_time = time.perf_counter() - start
+
+            HistoryStore.compact_history(history_location)
+            start = time.perf_counter()
+            HistoryStore.HistoryStore(history_location).get_value(chess.Board())
+            reload_time = time.perf_counter() - start
+
+        print("{:>10} {:>16.2f} {:>16.2f} {:>26.2f} {:>16.2f} {:>16.2f}".format(size, rewrite_time * 1000, append_time * 1000, compacting_append_time * 1000,
+            compaction_time * 1000, reload_time * 1000))
+
+
+def search_positions(player, positions, depth):
+    '''
+    searches all given positions to a fixed depth without time limit
+    returns the chosen moves, the overall number of nodes and the overall search time
+    '''
+    player.time_limit = float('inf')
+    moves = []
+    nodes = 0
+    start = time.perf_counter()
+    for fen in positions:
+        board = chess.Board(fen)
+        player.evaluation_funcs_dict = player.get_evaluation_funcs_by_dif(2, player.difficulty)
+        moves.append(player.iterative_deepening(board, depth, player.evaluate_board))
+        nodes += player.search_info.get("nodes", 0)
+    return moves, nodes, time.perf_counter() - start
+
+
+def benchmark_workers(args):
+    '''
+    measures the scaling of the root move splitting over different numbers of worker processes
+    '''
+    print("{:>8} {:>10} {:>10} {:>10} {:>8} {:>12}".format("workers", "time (s)", "nodes", "nps", "speedup", "same moves"))
+    serial_moves = None
+    serial_time = None
+    for workers in args.workers:
+        player = ai.Player(1, "Benchmark", 0, args.difficulty, workers=workers)
+        moves, nodes, search_time = search_positions(player, SEARCH_POSITIONS, args.depth)
+        player.close()
+        if serial_moves is None:
+            serial_moves, serial_time = moves, search_time
+        print("{:>8} {:>10.2f} {:>10} {:>10.0f} {:>8.2f} {:>12}".format(workers, search_time, nodes, nodes / search_time, serial_time / search_time, str(moves == serial_moves)))
+
+
+def benchmark_smp(args):
+    '''
+    measures effective nodes per second and reached depth of the lazy smp search for a fixed time per position
+    '''
+    print("{:>8} {:>10} {:>12} {:>14} {:>10} {:>16}".format("helpers", "nodes", "nps", "effective nps", "depth", "helper depths"))
+    for helpers in args.helpers:
+        player = ai.Player(1, "Benchmark", 0, args.difficulty, smp_helpers=helpers)
+        if helpers > 0:
+            # start the helper processes before the first measurement
+            player.get_search_pool()
+        for fen in SEARCH_POSITIONS:
+            player.time_limit = args.time
+            player.evaluation_funcs_dict = player.get_evaluation_funcs_by_dif(2, player.difficulty)
+            player.iterative_deepening(chess.Board(fen), SMP_MAX_DEPTH, player.evaluate_board)
+            info = player.search_info
+            print("{:>8} {:>10} {:>12.0f} {:>14.0f} {:>10} {:>16}".format(helpers, info["nodes"], info["nps"],
+                info.get("effective_nps", info["nps"]), info["depth"], str(info.get("helper_depths", []))))
+        player.close()
+
+
+def benchmark_pruning(args):
+    '''
+    measures the depth reached in a fixed time per position with and without null move pruning and late move reductions
+    '''
+    print("{:>10} {:>10} {:>10} {:>10} {:>10} {:>12}".format("features", "avg depth", "time (s)", "nodes", "nps", "same moves"))
+    reference_moves = None
+    for name, null_move_pruning, late_move_reductions in PRUNING_FEATURES:
+        player = ai.Player(1, "Benchmark", 0, args.difficulty, null_move_pruning=null_move_pruning, late_move_reductions=late_move_reductions)
+        moves, depths, nodes, search_time = [], [], 0, 0
+        for fen in SEARCH_POSITIONS:
+            player.time_limit = args.time
+            player.evaluation_funcs_dict = player.get_evaluation_funcs_by_dif(2, player.difficulty)
+            moves.append(player.iterative_deepening(chess.Board(fen), SMP_MAX_DEPTH, player.evaluate_board))
+            depths.append(player.search_info["depth"])
+            nodes += player.search_info["nodes"]
+            search_time += player.search_info["time"]
+        if reference_moves is None:
+            reference_moves = moves
+        print("{:>10} {:>10.2f} {:>10.2f} {:>10} {:>10.0f} {:>12}".format(name, sum(depths) / len(depths), search_time, nodes,
+            nodes / search_time if search_time > 0 else 0, str(moves == reference_moves)))
+
+
+def benchmark_evaluation(args):
+    '''
+    compares the evaluation terms with their former implementations: time per position, number of different values
+    and correlation of the values (the mobility term counts moves differently than before)
+    '''
+    random.seed(args.seed)
+    boards = get_random_boards(args.positions, EVALUATION_GAME_LENGTH)
+    terms = [
+        ("attacked pieces", lambda board, color: get_attacked_pieces_value_by_color(board, color, not color),
+            lambda board, color: EvaluationLib.get_attacked_pieces_value_by_color(board, color, not color)),
+        ("king safety", calculate_king_zone_safety, EvaluationLib.calculate_king_zone_safety),
+        ("mobility", calculate_mobility_value, EvaluationLib.calculate_mobility_value)
+    ]
+    print("{:>16} {:>14} {:>14} {:>10} {:>12} {:>12}".format("term", "former (us)", "current (us)", "speedup", "mismatches", "correlation"))
+    for name, former_func, current_func in terms:
+        former_values, former_time = evaluate_boards(boards, former_func)
+        current_values, current_time = evaluate_boards(boards, current_func)
+        mismatches = sum(1 for former_value, current_value in zip(former_values, current_values) if abs(former_value - current_value) > 1e-9)
+        correlation = np.corrcoef(former_values, current_values)[0, 1] if np.std(former_values) > 0 and np.std(current_values) > 0 else 1
+        print("{:>16} {:>14.2f} {:>14.2f} {:>10.1f} {:>12} {:>12.3f}".format(name, former_time / len(boards) * 1e6, current_time / len(boards) * 1e6,
+            former_time / current_time, mismatches, correlation))
+
+
+def evaluate_boards(boards, evaluation_func):
+    '''
+    evaluates all boards for both colors
+    returns list of values and the overall time
+    '''
+    start = time.perf_counter()
+    values = [evaluation_func(board, color) for board in boards for color in chess.COLORS]
+    return values, time.perf_counter() - start
+
+
+def benchmark_batch(args):
+    '''
+    compares the evaluation of single boards with the vectorised evaluation of batches of boards
+    uses the factors of the middle game for material, piece positions and attacked pieces
+    '''
+    random.seed(args.seed)
+    boards = get_random_boards(max(args.sizes), EVALUATION_GAME_LENGTH)
+    player = ai.Player(1, "Benchmark", 0, 3)
+    factor_dict = player.get_factors_by_game_status(2)
+    single_terms = [
+        (EvaluationLib.get_board_value, factor_dict["board_value"]),
+        (EvaluationLib.get_board_positions_value, factor_dict["board_position"]),
+        (EvaluationLib.get_opp_board_positions_value, factor_dict["opp_board_position"]),
+        (EvaluationLib.get_attacked_pieces_value, factor_dict["attacked_pieces"])
+    ]
+    print("{:>8} {:>16} {:>16} {:>10} {:>12}".format("batch", "single (pos/s)", "batch (pos/s)", "speedup", "max diff"))
+    for size in args.sizes:
+        batch = boards[:size]
+        start = time.perf_counter()
+        single_values = [sum(factor * func(board, chess.WHITE) for func, factor in single_terms) for board in batch]
+        single_time = time.perf_counter() - start
+        start = time.perf_counter()
+        batch_values = BatchEvaluation.evaluate_boards(batch, chess.WHITE, factor_dict)
+        batch_time = time.perf_counter() - start
+        print("{:>8} {:>16.0f} {:>16.0f} {:>10.1f} {:>12.2e}".format(size, size / single_time, size / batch_time, single_time / batch_time,
+            np.max(np.abs(np.array(single_values) - batch_values))))
+    player.close()
+
+
+def measure_startup():
+    '''
+    measures the startup of a fresh process: construction of the first player, opening of the whole tablebase
+    (done by every player before it was opened lazily) and the first endgame probe, which opens the tablebase now
+    '''
+    start = time.perf_counter()
+    player = ai.Player(1, "Benchmark", 0, SEARCH_DIFFICULTY)
+    player_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chess.syzygy.open_tablebase(Tablebase.SYZYGY_LOC).close()
+    open_time = time.perf_counter() - start
+
+    board = chess.Board(STARTUP_ENDGAME)
+    start = time.perf_counter()
+    player.tablebase.probe_wdl(board, chess.polyglot.zobrist_hash(board))
+    probe_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ai.Player(2, "Benchmark", 0, SEARCH_DIFFICULTY).close()
+    second_player_time = time.perf_counter() - start
+    player.close()
+    return player_time, second_player_time, open_time, probe_time
+
+
+def benchmark_startup(args):
+    '''
+    measures the cold startup of players in fresh processes
+    '''
+    context = multiprocessing.get_context("spawn")
+    print("{:>6} {:>14} {:>16} {:>20} {:>17}".format("run", "player (ms)", "2nd player (ms)", "open tablebase (ms)", "first probe (ms)"))
+    for run in range(args.runs):
+        with context.Pool(1) as pool:
+            times = pool.apply(measure_startup)
+        print("{:>6} {:>14.1f} {:>16.1f} {:>20.1f} {:>17.1f}".format(run, *(1000 * value for value in times)))
+
+
+def request_move(client, fen):
+    '''
+    returns the latency of a move request, None if it has been rejected by the server
+    '''
+    start = time.perf_counter()
+    try:
+        client.get_move(chess.Board(fen))
+    except RuntimeError:
+        return None
+    return time.perf_counter() - start
+
+
+def benchmark_server(args):
+    '''
+    sends move requests of several concurrent clients to a running move server (see server.py)
+    '''
+    clients = [api.Player(num, "Benchmark", 0, args.difficulty, server_url=args.url, time_limit=args.time) for num in range(args.clients)]
+    fens = [SEARCH_POSITIONS[num % len(SEARCH_POSITIONS)] for num in range(args.requests)]
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(args.clients) as executor:
+        latencies = list(executor.map(request_move, [clients[num % args.clients] for num in range(args.requests)], fens))
+    total_time = time.perf_counter() - start
+    rejected_requests = latencies.count(None)
+    latencies = sorted(latency for latency in latencies if not latency is None)
+    print("{} requests of {} clients in {:.2f} s ({:.1f} requests/s), {} rejected".format(args.requests, args.clients, total_time,
+        args.requests / total_time, rejected_requests))
+    if not latencies:
+        return
+    print("client latency: p50 {:.3f} s, p99 {:.3f} s".format(latencies[len(latencies) // 2], latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)]))
+    stats = clients[0].get_server_stats()
+    print("server latency: p50 {:.3f} s, p99 {:.3f} s, {} requests, {} rejected".format(stats["p50"], stats["p99"], stats["requests"], stats["rejected_requests"]))
+
+
+def crash_compaction(history_location, crash_point):
+    '''
+    runs a compaction which crashes instead of the file operation of given crash point
+    '''
+    history_location, _, compacting_location = HistoryStore.get_history_files(history_location)
+    crash_location, crash_func_name = {
+        "history": (history_location, "replace"),
+        "index": (HistoryStore.get_binary_location(history_location), "replace"),
+        "journal": (compacting_location, "remove")
+    }[crash_point]
+    file_func = getattr(os, crash_func_name)
+
+    def crashing_file_func(*locations):
+        if locations[-1] == crash_location:
+            raise SystemError("simulated crash")
+        return file_func(*locations)
+
+    setattr(os, crash_func_name, crashing_file_func)
+    try:
+        HistoryStore.compact_history(history_location)
+    except SystemError:
+        pass
+    finally:
+        setattr(os, crash_func_name, file_func)
+
+
+def benchmark_recovery(args):
+    '''
+    simulates compactions of the history which crash between their file operations and checks the values of all boards
+    while the compacting journal is left behind and after the next compaction has recovered it
+    '''
+    games = [get_random_game(HISTORY_GAME_LENGTH) for _ in range(args.games * 2)]
+    expected_values = {}
+    for turn_list in games:
+        for board_fen in set(turn_list):
+            expected_values[board_fen] = expected_values.get(board_fen, 0) + 1
+    print("{:>10} {:>16} {:>16}".format("crash", "after crash", "after recovery"))
+    for crash_point in RECOVERY_CRASH_POINTS:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            history_location = os.path.join(tmp_dir, "history.csv")
+            HistoryStore.append_games([(turn_list, 1) for turn_list in games[:args.games]], history_location)
+            HistoryStore.compact_history(history_location)
+            HistoryStore.append_games([(turn_list, 1) for turn_list in games[args.games:]], history_location)
+            crash_compaction(history_location, crash_point)
+            results = [get_wrong_history_values(history_location, expected_values)]
+            HistoryStore.compact_history(history_location)
+            results.append(get_wrong_history_values(history_location, expected_values))
+        print("{:>10} {:>16} {:>16}".format(crash_point, *("ok" if wrong_values == 0 else "{} wrong".format(wrong_values) for wrong_values in results)))
+
+
+def get_wrong_history_values(history_location, expected_values):
+    '''
+    returns the number of boards whose value in a fresh history store differs from the expected one
+    '''
+    history_store = HistoryStore.HistoryStore(history_location)
+    return sum(history_store.get_value(chess.Board(board_fen)) != value for board_fen, value in expected_values.items())
+
+
+def get_random_won_board(pieces, tablebase):
+    '''
+    returns a random board with given pieces which is won by white, white to move
+    '''
+    while True:
+        board = chess.Board(None)
+        for square, symbol in zip(random.sample(chess.SQUARES, len(pieces)), pieces):
+            board.set_piece_at(square, chess.Piece.from_symbol(symbol))
+        if board.is_valid() and not board.is_game_over() and tablebase.probe_wdl(board) == 2:
+            return board
+
+
+def benchmark_conversion(args):
+    '''
+    plays won endgames with the tablebase move choice for both sides and counts the games which white has converted into mate
+    the winning side has to push its pawns, so zeroing moves are rated correctly only if these endgames are converted
+    '''
+    random.seed(args.seed)
+    prober = Tablebase.TablebaseProber()
+    print("{:>8} {:>8} {:>10} {:>10}".format("endgame", "games", "converted", "avg plies"))
+    for pieces in args.endgames:
+        converted, plies, failed_boards = 0, 0, []
+        for _ in range(args.games):
+            board = get_random_won_board(pieces, prober.get_tablebase())
+            start_fen = board.fen()
+            while not board.is_game_over() and board.ply() < CONVERSION_MAX_PLIES:
+                board.push(prober.get_root_move(board))
+            if board.is_checkmate() and board.turn == chess.BLACK:
+                converted += 1
+                plies += board.ply()
+            else:
+                failed_boards.append(start_fen)
+        print("{:>8} {:>8} {:>10} {:>10.1f}".format(pieces, args.games, converted, plies / converted if converted > 0 else 0))
+        for fen in failed_boards:
+            print("    not converted: {}".format(fen))
+
+
+def read_bench_positions(positions_location):
+    '''
+    returns name, category and board of all positions of given epd file, they are named by the id operation and categorized by the c0 operation
+    '''
+    positions = []
+    with open(positions_location) as positions_file:
+        for line in positions_file:
+            if not line.strip() or line.startswith("#"):
+                continue
+            board, operations = chess.Board.from_epd(line)
+            positions.append((operations.get("id", str(len(positions) + 1)), operations.get("c0", ""), board))
+    return positions
+
+
+def bench_search(player, board, depth, time_limit):
+    '''
+    searches given board with the evaluation of its game status like calculate_move, but without opening book or tablebase move at the root
+    the tables are cleared before the search, so a search without time limit visits the same nodes in every run
+    returns the move, the search info and the elapsed time after each completed iteration
+    '''
+    iteration_times = {}
+    player.info_callback = lambda search_info: iteration_times.update({search_info["depth"]: search_info["time"]})
+    player.time_limit = time_limit
+    player.game_status = player.get_game_status(board)
+    player.evaluation_funcs_dict = player.get_evaluation_funcs_by_dif(player.game_status, player.difficulty)
+    player.evaluation_funcs_status = player.game_status
+    move = player.iterative_deepening(board.copy(), depth, player.evaluate_board)
+    player.info_callback = None
+    return move, player.search_info, iteration_times
+
+
+def get_bench_signature(results):
+    '''
+    returns the signature of fixed depth searches: overall number of nodes and checksum of nodes and move of every position
+    '''
+    nodes = sum(info["nodes"] for _, move, info in results)
+    checksum = zlib.crc32("".join("{} {} {}\n".format(name, info["nodes"], move.uci()) for name, move, info in results).encode())
+    return "{}-{:08x}".format(nodes, checksum)
+
+
+def bench_difficulty(player, positions, depth, time_limit):
+    '''
+    searches all positions to a fixed depth and, if time_limit is set, for a fixed time
+    the time to depth is the average time of the fixed depth searches until an iteration has been completed
+    returns the results of the fixed depth searches
+    '''
+    header = "{:>12} {:>11} {:>6} {:>10} {:>10} {:>8} {:>9}".format("position", "category", "move", "nodes", "nps", "tt hits", "time (s)")
+    if time_limit:
+        header += " {:>3} {:>6} {:>6} {:>10} {:>10} {:>8}".format("|", "move", "depth", "nodes", "nps", "tt hits")
+    print(header)
+    depth_results = []
+    timed_results = []
+    depth_times = {}
+    for name, category, board in positions:
+        move, info, iteration_times = bench_search(player, board, depth, None)
+        depth_results.append((name, move, info))
+        for iteration_depth, iteration_time in iteration_times.items():
+            depth_times.setdefault(iteration_depth, []).append(iteration_time)
+        line = "{:>12} {:>11} {:>6} {:>10} {:>10.0f} {:>8.1%} {:>9.3f}".format(name, category, move.uci(), info["nodes"], info["nps"],
+            info["tt_hit_rate"], info["time"])
+        if time_limit:
+            move, info, _ = bench_search(player, board, SMP_MAX_DEPTH, time_limit)
+            timed_results.append((category, move, info))
+            line += " {:>3} {:>6} {:>6} {:>10} {:>10.0f} {:>8.1%}".format("|", move.uci(), info["depth"], info["nodes"], info["nps"], info["tt_hit_rate"])
+        print(line)
+
+    for results, label in ((depth_results, "depth {}".format(depth)), (timed_results, "{} s".format(time_limit))):
+        if not results:
+            continue
+        nodes = sum(info["nodes"] for _, _, info in results)
+        search_time = sum(info["time"] for _, _, info in results)
+        print("{}: {} nodes in {:.2f} s, {:.0f} nps, tt hit rate {:.1%}".format(label, nodes, search_time, nodes / search_time if search_time > 0 else 0,
+            sum(info["tt_hit_rate"] for _, _, info in results) / len(results)))
+    # boards inside of the tablebase reach the maximum depth at once, so the depth is averaged per category
+    category_depths = {}
+    for category, _, info in timed_results:
+        category_depths.setdefault(category, []).append(info["depth"])
+    if category_depths:
+        print("average depth: {}".format(", ".join("{} {:.2f}".format(category, sum(depths) / len(depths)) for category, depths in category_depths.items())))
+    print("time to depth: {}".format(", ".join("{} {:.3f} s".format(iteration_depth, sum(times) / len(times)) for iteration_depth, times in sorted(depth_times.items()))))
+    print("signature: {}".format(get_bench_signature(depth_results)))
+    return depth_results
+
+
+def benchmark_bench(args):
+    '''
+    searches the positions of the bench file (opening, middlegame and tablebase endgames) with every difficulty to a fixed depth and for a fixed time
+    the nodes of the fixed depth searches do not depend on the machine, so their signature only changes if the search itself changes
+    exits with an error if the signature differs from the expected one
+    '''
+    positions = read_bench_positions(args.positions)
+    # the history of played games is part of the evaluation, with an empty history the signature does not depend on the played games
+    history_location = EvaluationLib.HISTORY_FILE_LOC
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        EvaluationLib.HISTORY_FILE_LOC = os.path.join(tmp_dir, "history.csv")
+        try:
+            for difficulty in args.difficulties:
+                depth = BENCH_DEPTHS[difficulty] if args.depth is None else args.depth
+                print("\ndifficulty {}: depth {}{}".format(difficulty, depth, ", {} s per position".format(args.time) if args.time else ""))
+                player = ai.Player(1, "Benchmark", 0, difficulty)
+                results += bench_difficulty(player, positions, depth, args.time)
+                player.close()
+        finally:
+            EvaluationLib.HISTORY_FILE_LOC = history_location
+
+    signature = get_bench_signature(results)
+    print("\nbench signature: {}".format(signature))
+    if not args.expect is None and args.expect != signature:
+        print("signature differs from expected signature {}".format(args.expect))
+        sys.exit(1)
+
+
+def initialize_parser():
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="benchmark")
+    subparsers.required = True
+
+    history_parser = subparsers.add_parser("history", help="per-game write costs of the board history")
+    history_parser.add_argument("--sizes", nargs="+", type=int, default=HISTORY_SIZES, help="number of boards in the history")
+    history_parser.add_argument("--games", type=int, default=HISTORY_GAMES, help="number of games written per history size")
+    history_parser.set_defaults(func=benchmark_history)
+
+    workers_parser = subparsers.add_parser("workers", help="scaling of the parallel root move search")
+    workers_parser.add_argument("--workers", nargs="+", type=int, default=WORKER_COUNTS, help="numbers of worker processes, the first one is the reference")
+    workers_parser.add_argument("--depth", type=int, default=SEARCH_DEPTH, help="search depth")
+    workers_parser.add_argument("--difficulty", type=int, choices=range(1, 4), default=SEARCH_DIFFICULTY, help="difficulty of the ai")
+    workers_parser.set_defaults(func=benchmark_workers)
+
+    smp_parser = subparsers.add_parser("smp", help="effective nodes per second and depth of the lazy smp search")
+    smp_parser.add_argument("--helpers", nargs="+", type=int, default=HELPER_COUNTS, help="numbers of helper processes")
+    smp_parser.add_argument("--time", type=int, default=SMP_TIME_LIMIT, help="time limit per position in seconds")
+    smp_parser.add_argument("--difficulty", type=int, choices=range(1, 4), default=SEARCH_DIFFICULTY, help="difficulty of the ai")
+    smp_parser.set_defaults(func=benchmark_smp)
+
+    pruning_parser = subparsers.add_parser("pruning", help="depth reached in a fixed time with null move pruning and late move reductions")
+    pruning_parser.add_argument("--time", type=int, default=PRUNING_TIME_LIMIT, help="time limit per position in seconds")
+    pruning_parser.add_argument("--difficulty", type=int, choices=range(1, 4), default=PRUNING_DIFFICULTY, help="difficulty of the ai")
+    pruning_parser.set_defaults(func=benchmark_pruning)
+
+    evaluation_parser = subparsers.add_parser("evaluation", help="speed and parity of the evaluation terms with their former implementations")
+    evaluation_parser.add_argument("--positions", type=int, default=EVALUATION_POSITIONS, help="number of random positions")
+    evaluation_parser.add_argument("--seed", type=int, default=0, help="seed of the random games")
+    evaluation_parser.set_defaults(func=benchmark_evaluation)
+
+    batch_parser = subparsers.add_parser("batch", help="evaluation of single boards compared with the vectorised batch evaluation")
+    batch_parser.add_argument("--sizes", nargs="+", type=int, default=BATCH_SIZES, help="numbers of boards per batch")
+    batch_parser.add_argument("--seed", type=int, default=0, help="seed of the random games")
+    batch_parser.set_defaults(func=benchmark_batch)
+
+    startup_parser = subparsers.add_parser("startup", help="cold startup of players and the first endgame probe in fresh processes")
+    startup_parser.add_argument("--runs", type=int, default=STARTUP_RUNS, help="number of fresh processes")
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    server_parser = subparsers.add_parser("server", help="latency of a running move server under concurrent requests")
+    server_parser.add_argument("--url", default=api.SERVER_URL, help="address of the move server")
+    server_parser.add_argument("--clients", type=int, default=SERVER_CLIENTS, help="number of concurrent clients")
+    server_parser.add_argument("--requests", type=int, default=SERVER_REQUESTS, help="overall number of requests")
+    server_parser.add_argument("--time", type=float, default=SERVER_MOVE_TIME, help="time per move in seconds")
+    server_parser.add_argument("--difficulty", type=int, choices=range(1, 4), default=SEARCH_DIFFICULTY, help="difficulty of the ai")
+    server_parser.set_defaults(func=benchmark_server)
+
+    recovery_parser = subparsers.add_parser("recovery", help="values of the history after compactions which crash between their file operations")
+    recovery_parser.add_argument("--games", type=int, default=RECOVERY_GAMES, help="number of games before and after the first compaction")
+    recovery_parser.set_defaults(func=benchmark_recovery)
+
+    conversion_parser = subparsers.add_parser("conversion", help="won tablebase endgames converted into mate by the tablebase move choice")
+    conversion_parser.add_argument("--endgames", nargs="+", default=CONVERSION_ENDGAMES, help="pieces of the endgames, upper case white, lower case black")
+    conversion_parser.add_argument("--games", type=int, default=CONVERSION_GAMES, help="number of games per endgame")
+    conversion_parser.add_argument("--seed", type=int, default=0, help="seed of the random boards")
+    conversion_parser.set_defaults(func=benchmark_conversion)
+
+    bench_parser = subparsers.add_parser("bench", help="nodes, speed and signature of fixed depth and fixed time searches of the bench positions")
+    bench_parser.add_argument("--positions", default=BENCH_POSITIONS_LOC, help="epd file of the positions")
+    bench_parser.add_argument("--difficulties", nargs="+", type=int, choices=range(1, 4), default=BENCH_DIFFICULTIES, help="difficulties of the ai")
+    bench_parser.add_argument("--depth", type=int, help="depth of the fixed depth searches, by default set by difficulty")
+    bench_parser.add_argument("--time", type=float, default=BENCH_TIME_LIMIT, help="time limit per position of the fixed time searches in seconds, 0 to skip them")
+    bench_parser.add_argument("--expect", help="expected signature, e.g. of the last release")
+    bench_parser.set_defaults(func=benchmark_bench)
+    return parser
+
+
+if __name__ == '__main__':
+    parser = initialize_parser()
+    args = parser.parse_args()
+    args.func(args)
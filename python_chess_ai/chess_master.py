@@ -8,8 +8,8 @@
 #
 
 import chess
-import pandas as pd
 import misc.tools as Tools
+import misc.history_store as HistoryStore
 
 GAME_FINISHED_MESSAGE = "Game finished. You want a rematch? (Type 1 if yes)"
 WRONG_INPUT_MESSAGE = "Wrong input. Please repeat."
@@ -24,6 +24,8 @@ class ChessMaster:
 
             board = chess.Board()
             turn_list = list()
+            for player in players:
+                player.new_game()
             while not board.is_game_over():
                 current_player = players[int(not board.turn)]
                 current_player.print_board(current_player.name, board)
@@ -53,13 +55,6 @@ class ChessMaster:
         # Todo: replace victory status calculation with correct version (draw/player1/player2)
         victory_status = Tools.get_board_result(final_board)
 
-        new_turn_dict = dict.fromkeys(turn_list, victory_status)
-        # get existing board history
-        history = pd.read_csv(HISTORY_FILE_LOC)
-        history_dict = dict(zip(list(history.board), list(history.value)))
-        # merge existing history with new boards and sum the victory states
-        merged_history_dict = { k: new_turn_dict.get(k, 0) + history_dict.get(k, 0) for k in set(new_turn_dict) | set(history_dict) }
-        merged_history = pd.DataFrame(list(merged_history_dict.items()), columns=['board','value'])
-        # overwrite history csv with new, merged history
-        merged_history.to_csv(HISTORY_FILE_LOC)
-
+        # append boards of this game to the history journal, it is merged into the history file once it has grown large enough
+        HistoryStore.append_game(turn_list, victory_status, HISTORY_FILE_LOC)
+        HistoryStore.compact_history_in_background(HISTORY_FILE_LOC)
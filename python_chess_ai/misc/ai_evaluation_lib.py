@@ -8,8 +8,8 @@
 #
 
 import chess
-import pandas as pd
 import numpy as np
+import misc.history_store as HistoryStore
 
 PAWN_VALUE = 1
 ROOK_VALUE = 5
@@ -74,6 +74,27 @@ KING_POSITION_MATRIX =      np.array(   [[-30,-40,-40,-50,-50,-40,-40,-30],
 
 HISTORY_FILE_LOC = "res/history.csv"
 
+# piece types whose attacks on the king zone are counted by the king safety
+KING_ATTACKER_TYPES = [chess.KNIGHT, chess.BISHOP, chess.ROOK, chess.QUEEN]
+
+
+def calculate_king_zone_mask(square, color):
+    '''
+    returns bitboard of the king zone of a king of given color on given square, see calculate_king_zone
+    '''
+    king_rank, king_file = chess.square_rank(square), chess.square_file(square)
+    rank_range = range(0,4) if color == chess.WHITE else range(-3, 1)
+    mask = chess.BB_EMPTY
+    for rank in (king_rank + rank_summand for rank_summand in rank_range):
+        for file in (king_file + file_summand for file_summand in range(-1, 2)):
+            if rank in range(0, 8) and file in range(0, 8):
+                mask |= chess.BB_SQUARES[chess.square(file, rank)]
+    return mask
+
+
+# KING_ZONE_MASKS[color][king square], black first so the color can be used as index
+KING_ZONE_MASKS = [[calculate_king_zone_mask(square, color) for square in chess.SQUARES] for color in (chess.BLACK, chess.WHITE)]
+
 
 def assign_piece_value(piece_type, count_king=True):
     '''
@@ -109,19 +130,35 @@ def get_board_value(board, color, count_king=True):
     return white_value - black_value if color is chess.WHITE else black_value - white_value
 
 
+def get_pawn_attack_masks(pawns, color):
+    '''
+    returns bitboards of the squares attacked by given pawns to the east and to the west
+    '''
+    if color == chess.WHITE:
+        return ((pawns << 9) & ~chess.BB_FILE_A) & chess.BB_ALL, ((pawns << 7) & ~chess.BB_FILE_H) & chess.BB_ALL
+    return (pawns >> 7) & ~chess.BB_FILE_A, (pawns >> 9) & ~chess.BB_FILE_H
+
+
+def get_attack_mask(board, color):
+    '''
+    returns bitboard of all squares attacked by pieces of given color
+    pawn attacks are shifted all at once, the attacks of the other pieces are looked up per piece
+    '''
+    east_attacks, west_attacks = get_pawn_attack_masks(board.pawns & board.occupied_co[color], color)
+    attacks = east_attacks | west_attacks
+    for square in chess.scan_forward(board.occupied_co[color] & ~board.pawns):
+        attacks |= board.attacks_mask(square)
+    return attacks
+
+
 def get_attacked_pieces_value_by_color(board, attacker_color, defender_color):
     '''
     calculates how many figures are attacked by given color and assigns a value for every attacked figure
     '''
-    # filters squares for attacked squares, on which a figure of defender is placed
-    attacked_squares = filter(lambda square: board.is_attacked_by(attacker_color, square) and not board.piece_at(
-        square) is None and board.piece_at(square).color is defender_color, chess.SQUARES)
-    # maps piece type to attacked figure
-    attacked_pieces = map(lambda square: board.piece_at(square).piece_type, attacked_squares)
-    # maps piece value to attacked pieces
-    value = map(assign_piece_value, attacked_pieces)
+    attacked = get_attack_mask(board, attacker_color) & board.occupied_co[defender_color]
     # sums piece value of all attacked pieces
-    return sum(value)
+    return sum(chess.popcount(attacked & board.pieces_mask(piece_type, defender_color)) * assign_piece_value(piece_type)
+        for piece_type in chess.PIECE_TYPES)
 
 
 def get_attacked_pieces_value(board, color):
@@ -186,48 +223,20 @@ def get_opp_board_positions_value(board, color):
     return -1 * get_board_positions_value(board, opp_color)
 
 
-def get_piece_position(board, piece):
-    '''
-    returns position of given piece
-    if piece exists multiple times it returns first to be found
-    '''
-    for rank in range(0,8):
-        for file in range(0,8):
-            if board.piece_at(chess.square(file, rank)) == piece:
-                return rank, file
-
-
 def calculate_king_zone(board, color):
     '''
     calculates king zone of king of given color with a
     width of 3 squares (1 to the left, 1 to the right of the king)
     height of 4 squares (3 to to the front of the king)
     '''
-    king_zone = chess.SquareSet()
-    king_rank, king_file = get_piece_position(board, chess.Piece(chess.KING, color))
-
-    rank_range = range(0,4) if color == chess.WHITE else range(-3, 1)
-    for rank_summand in rank_range:
-        if (king_rank + rank_summand) in range(0, 8):
-            for file_summand in range(-1, 2):
-                if (king_file + file_summand) in range (0,8):
-                    king_zone.add(chess.square(king_file + file_summand, king_rank + rank_summand))
-    
-    return king_zone
+    return chess.SquareSet(KING_ZONE_MASKS[color][board.king(color)])
 
-def get_attackers_by_squares(board, square_set, attacker_color):
+def get_king_zone_attacker_types(board, king_zone, attacker_color):
     '''
-    returns dictionary with all attackers of a given square set
-    key = attacker, value = num of fields attacker is attacking
+    returns list of piece types (except pawn and king) of given color which attack at least one square of the king zone
     '''
-    attacker_dict = {}
-    for square in square_set:
-        attacker_square_set = board.attackers(attacker_color, square)
-        for attacker_square in attacker_square_set:
-            attacker_piece = board.piece_at(attacker_square)
-            if not (attacker_piece.piece_type is chess.PAWN or attacker_piece.piece_type is chess.KING):
-                attacker_dict[attacker_piece] = attacker_dict.get(attacker_piece, 0) + 1
-    return attacker_dict
+    return [piece_type for piece_type in KING_ATTACKER_TYPES
+        if any(board.attacks_mask(square) & king_zone for square in chess.scan_forward(board.pieces_mask(piece_type, attacker_color)))]
 
 def get_king_attack_weight(piece_counter):
     '''
@@ -261,12 +270,14 @@ def calculate_king_zone_safety(board, color):
     uses num of attackers, piece type of attackers and num of attacked squares per piece
     '''
     attacker_color = chess.WHITE if color == chess.BLACK else chess.BLACK
-    king_zone = calculate_king_zone(board, color)
-    attackers = get_attackers_by_squares(board, king_zone, attacker_color)
-    attack_weight = get_king_attack_weight(len(attackers))
+    king_square = board.king(color)
+    if king_square is None:
+        return 0
+    attacker_types = get_king_zone_attacker_types(board, KING_ZONE_MASKS[color][king_square], attacker_color)
+    attack_weight = get_king_attack_weight(len(attacker_types))
     value_of_attack = 0
-    for attacker in attackers:
-        value_of_attack += get_king_attack_constants(attacker.piece_type)
+    for piece_type in attacker_types:
+        value_of_attack += get_king_attack_constants(piece_type)
     
     return -1 * (value_of_attack * attack_weight) / 1000
 
@@ -280,21 +291,20 @@ def calculate_opp_king_zone_safety(board, color):
     return -1 * calculate_king_zone_safety(board, opp_color)
 
 
-def get_num_of_legal_moves_by_color(board, color):
+def get_mobility_by_color(board, color):
     '''
-    returns number of legal moves for given color
-    if given color is not the color to make the next move, the average for all possible moves of opponent is returned
+    returns number of pseudo-legal moves of given color (without castling, double pawn pushes and en passant)
+    the moves are counted from the attacks of every piece, so it does not matter which color makes the next move
     '''
-    player = chess.WHITE if bool(board.turn) else chess.BLACK
-    if player == color or len(list(board.legal_moves)) is 0:
-        return len(list(board.legal_moves))
-    else:
-        overall_legal_moves = 0
-        for action in board.legal_moves:
-            tmp_board = chess.Board(str(board.fen()))
-            tmp_board.push(action)
-            overall_legal_moves += len(list(tmp_board.legal_moves))
-        return overall_legal_moves / len(list(board.legal_moves))
+    own_pieces = board.occupied_co[color]
+    pawns = board.pawns & own_pieces
+    pawn_pushes = (pawns << 8) & chess.BB_ALL if color == chess.WHITE else pawns >> 8
+    mobility = chess.popcount(pawn_pushes & ~board.occupied)
+    for pawn_attacks in get_pawn_attack_masks(pawns, color):
+        mobility += chess.popcount(pawn_attacks & board.occupied_co[not color])
+    for square in chess.scan_forward(own_pieces & ~board.pawns):
+        mobility += chess.popcount(board.attacks_mask(square) & ~own_pieces)
+    return mobility
 
 
 def calculate_mobility_value(board, color):
@@ -302,29 +312,14 @@ def calculate_mobility_value(board, color):
     returns mobility value (num of possible moves)
     returns positive value if given player has more moves to make, negative if not
     '''
-    player = chess.WHITE if bool(board.turn) else chess.BLACK
-    current_turn_len = len(list(board.legal_moves))
-
-    if current_turn_len > 0:
-        tmp_board = chess.Board(str(board.fen()))
-        tmp_board.push(list(board.legal_moves)[0])
-        next_turn_len = len(list(tmp_board.legal_moves))
-    else:
-        next_turn_len = 0
-    
-    if player == color:
-        return (current_turn_len - next_turn_len) / 10
-    else:
-        return (next_turn_len - current_turn_len) / 10
+    return (get_mobility_by_color(board, color) - get_mobility_by_color(board, not color)) / 10
 
 
 def get_board_value_by_history(board, color):
     '''
-    check history file if board has stored given board
+    check history if board has stored given board
     returns value of the board in case it does
     otherwise it returns 0
     '''
-    dataset = pd.read_csv(HISTORY_FILE_LOC)
-    row = dataset.loc[dataset['board'] == board.fen().split(" ")[0]]
-    value = row['value'].item() if len(row['value']) == 1 else 0
+    value = HistoryStore.get_history_store(HISTORY_FILE_LOC).get_value(board)
     return value if color is chess.WHITE else -1*value
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides a vectorised evaluation of many boards at once (e.g. all children of a node or a whole game history)
+#
+
+import chess
+import numpy as np
+import misc.ai_evaluation_lib as EvaluationLib
+import misc.incremental_evaluation as IncrementalEvaluation
+
+# boards are encoded as piece planes: one bitmap of 64 squares per color and piece type,
+# white pawn to white king first (planes 0 to 5), then black pawn to black king (planes 6 to 11)
+PLANES = [(color, piece_type) for color in (chess.WHITE, chess.BLACK) for piece_type in chess.PIECE_TYPES]
+NUM_PLANES = len(PLANES)
+WHITE_PLANES = slice(0, 6)
+BLACK_PLANES = slice(6, 12)
+
+PLANE_VALUES = np.array([EvaluationLib.assign_piece_value(piece_type) for _, piece_type in PLANES], dtype=np.int64)
+# PLANE_POSITION_TABLES[plane][square], same values as the position matrices of EvaluationLib
+PLANE_POSITION_TABLES = np.array([IncrementalEvaluation.POSITION_TABLES[color][piece_type] for color, piece_type in PLANES], dtype=np.int64)
+
+NOT_FILE_A = np.uint64(chess.BB_ALL & ~chess.BB_FILE_A)
+NOT_FILE_H = np.uint64(chess.BB_ALL & ~chess.BB_FILE_H)
+
+# ray directions of the sliding pieces: shift (positive to the north) and mask against wrapping around the board
+ROOK_DIRECTIONS = [(8, None), (-8, None), (1, NOT_FILE_A), (-1, NOT_FILE_H)]
+BISHOP_DIRECTIONS = [(9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H)]
+KNIGHT_DIRECTIONS = [(17, NOT_FILE_A), (15, NOT_FILE_H), (10, np.uint64(chess.BB_ALL & ~(chess.BB_FILE_A | chess.BB_FILE_B))),
+    (6, np.uint64(chess.BB_ALL & ~(chess.BB_FILE_G | chess.BB_FILE_H))), (-6, np.uint64(chess.BB_ALL & ~(chess.BB_FILE_A | chess.BB_FILE_B))),
+    (-10, np.uint64(chess.BB_ALL & ~(chess.BB_FILE_G | chess.BB_FILE_H))), (-15, NOT_FILE_A), (-17, NOT_FILE_H)]
+KING_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+
+
+def encode_boards(boards):
+    '''
+    encodes given boards as array of piece planes with shape (N, 12, 64)
+    '''
+    masks = np.array([[board.pieces_mask(piece_type, color) for color, piece_type in PLANES] for board in boards], dtype=np.uint64)
+    return masks_to_planes(masks.reshape(len(boards), NUM_PLANES))
+
+
+def get_turns(boards):
+    '''
+    returns array with the color to move of every board
+    '''
+    return np.array([board.turn for board in boards], dtype=bool)
+
+
+def masks_to_planes(masks):
+    '''
+    converts bitboards with shape (N, 12) to piece planes with shape (N, 12, 64)
+    '''
+    bits = np.unpackbits(masks.astype('<u8').view(np.uint8), bitorder='little')
+    return bits.reshape(masks.shape[0], NUM_PLANES, 64)
+
+
+def planes_to_masks(planes):
+    '''
+    converts piece planes with shape (N, 12, 64) to bitboards with shape (N, 12)
+    '''
+    packed = np.packbits(planes.astype(np.uint8), axis=2, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8').reshape(planes.shape[0], NUM_PLANES)
+
+
+def shift(masks, offset, wrap_mask=None):
+    '''
+    shifts bitboards by given number of squares (positive to the north), squares shifted over the edge of the board are removed
+    '''
+    shifted = masks << np.uint64(offset) if offset > 0 else masks >> np.uint64(-offset)
+    return shifted if wrap_mask is None else shifted & wrap_mask
+
+
+def get_ray_attacks(sliders, empty, directions):
+    '''
+    returns bitboards of all squares attacked along the given directions:
+    the sliders are shifted step by step through the empty squares, the first occupied square is attacked as well
+    '''
+    attacks = np.zeros_like(sliders)
+    for offset, wrap_mask in directions:
+        ray = sliders
+        for _ in range(7):
+            ray = shift(ray, offset, wrap_mask)
+            attacks |= ray
+            ray &= empty
+    return attacks
+
+
+def get_step_attacks(pieces, directions):
+    attacks = np.zeros_like(pieces)
+    for offset, wrap_mask in directions:
+        attacks |= shift(pieces, offset, wrap_mask)
+    return attacks
+
+
+def get_attack_masks(masks, color):
+    '''
+    returns bitboards of all squares attacked by pieces of given color, same as EvaluationLib.get_attack_mask
+    '''
+    own = masks[:, WHITE_PLANES] if color == chess.WHITE else masks[:, BLACK_PLANES]
+    occupied = np.bitwise_or.reduce(masks, axis=1)
+    empty = ~occupied
+    pawns, knights, bishops, rooks, queens, kings = (own[:, index] for index in range(6))
+    if color == chess.WHITE:
+        attacks = shift(pawns, 9, NOT_FILE_A) | shift(pawns, 7, NOT_FILE_H)
+    else:
+        attacks = shift(pawns, -7, NOT_FILE_A) | shift(pawns, -9, NOT_FILE_H)
+    attacks |= get_step_attacks(knights, KNIGHT_DIRECTIONS)
+    attacks |= get_step_attacks(kings, KING_DIRECTIONS)
+    attacks |= get_ray_attacks(bishops | queens, empty, BISHOP_DIRECTIONS)
+    attacks |= get_ray_attacks(rooks | queens, empty, ROOK_DIRECTIONS)
+    return attacks
+
+
+def get_material(planes):
+    '''
+    returns arrays with the material of white and of black per board
+    '''
+    values = planes.sum(axis=2, dtype=np.int64) * PLANE_VALUES
+    return values[:, WHITE_PLANES].sum(axis=1), values[:, BLACK_PLANES].sum(axis=1)
+
+
+def get_board_values(planes, color):
+    '''
+    same as EvaluationLib.get_board_value for every board
+    '''
+    white_value, black_value = get_material(planes)
+    return white_value - black_value if color == chess.WHITE else black_value - white_value
+
+
+def get_positions(planes):
+    '''
+    returns arrays with the summed position values of white and of black per board
+    '''
+    values = np.einsum('nps,ps->np', planes.astype(np.int64), PLANE_POSITION_TABLES)
+    return values[:, WHITE_PLANES].sum(axis=1), values[:, BLACK_PLANES].sum(axis=1)
+
+
+def get_board_positions_values(planes, color):
+    '''
+    same as EvaluationLib.get_board_positions_value for every board
+    '''
+    white_positions, black_positions = get_positions(planes)
+    return (white_positions if color == chess.WHITE else black_positions) / 100
+
+
+def get_opp_board_positions_values(planes, color):
+    '''
+    same as EvaluationLib.get_opp_board_positions_value for every board
+    '''
+    return -1 * get_board_positions_values(planes, not color)
+
+
+def get_attacked_pieces_values_by_color(planes, masks, attacker_color):
+    '''
+    same as EvaluationLib.get_attacked_pieces_value_by_color for every board (defender is the other color)
+    '''
+    attacked = masks_to_planes(np.repeat(get_attack_masks(masks, attacker_color)[:, np.newaxis], NUM_PLANES, axis=1))
+    defender_planes = BLACK_PLANES if attacker_color == chess.WHITE else WHITE_PLANES
+    attacked_pieces = (planes[:, defender_planes] & attacked[:, defender_planes]).sum(axis=2, dtype=np.int64)
+    return attacked_pieces @ PLANE_VALUES[defender_planes]
+
+
+def get_attacked_pieces_values(planes, turns, color):
+    '''
+    same as EvaluationLib.get_attacked_pieces_value for every board
+    '''
+    masks = planes_to_masks(planes)
+    white_factor = np.where(turns, 1, 1/2)
+    black_factor = np.where(turns, 1/2, 1)
+    white_value = white_factor * get_attacked_pieces_values_by_color(planes, masks, chess.WHITE)
+    black_value = black_factor * get_attacked_pieces_values_by_color(planes, masks, chess.BLACK)
+    return white_value - black_value if color == chess.WHITE else black_value - white_value
+
+
+def evaluate_boards(boards, color, factor_dict):
+    '''
+    evaluates all given boards from the view of given color with the factors of a game status (see Player.get_factors_by_game_status)
+    supports the terms board_value, board_position, opp_board_position and attacked_pieces, all other factors are ignored
+    returns array of values in order of the boards
+    '''
+    planes = encode_boards(boards)
+    values = np.zeros(len(boards))
+    if factor_dict.get("board_value", 0) > 0:
+        values += factor_dict["board_value"] * get_board_values(planes, color)
+    if factor_dict.get("board_position", 0) > 0:
+        values += factor_dict["board_position"] * get_board_positions_values(planes, color)
+    if factor_dict.get("opp_board_position", 0) > 0:
+        values += factor_dict["opp_board_position"] * get_opp_board_positions_values(planes, color)
+    if factor_dict.get("attacked_pieces", 0) > 0:
+        values += factor_dict["attacked_pieces"] * get_attacked_pieces_values(planes, get_turns(boards), color)
+    return values
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides a cache for board evaluations keyed on the zobrist hash of a board
+#
+
+import array
+
+DEFAULT_SIZE_MB = 4
+
+# every entry consists of a 64 bit check word and a 64 bit value
+ENTRY_BYTES = 16
+# set in the check word of every used entry, so an empty entry never matches a key
+VALID_BIT = 1 << 63
+
+
+class EvaluationCache:
+    '''
+    fixed size hash table which stores the values of evaluated boards by zobrist key
+    the table size is a power of two: the lower bits of the key select the entry,
+    the remaining upper bits are stored as check word to verify that the entry belongs to the key
+    entries are always replaced by the newest evaluation
+    the values depend on the evaluation factors, so the cache has to be cleared as soon as they change
+    '''
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB):
+        self.size_mb = size_mb
+        self.index_bits = max(1, (int(size_mb * 1024 * 1024) // ENTRY_BYTES).bit_length() - 1)
+        self.index_mask = (1 << self.index_bits) - 1
+        self.num_entries = 1 << self.index_bits
+        self.clear()
+
+    def clear(self):
+        self.checks = array.array('Q', bytes(8 * self.num_entries))
+        self.values = array.array('d', bytes(8 * self.num_entries))
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        '''
+        returns stored value of the given zobrist key
+        returns None if the key is not in the cache
+        '''
+        index = key & self.index_mask
+        if self.checks[index] == (key >> self.index_bits) | VALID_BIT:
+            self.hits += 1
+            return self.values[index]
+        self.misses += 1
+        return None
+
+    def store(self, key, value):
+        index = key & self.index_mask
+        self.checks[index] = (key >> self.index_bits) | VALID_BIT
+        self.values[index] = value
+
+    def get_stats(self):
+        '''
+        returns counters since the last reset
+        '''
+        probes = self.hits + self.misses
+        return {
+            "eval_cache_hits": self.hits,
+            "eval_cache_misses": self.misses,
+            "eval_cache_hit_rate": self.hits / probes if probes > 0 else 0
+        }
+
+    def add_stats(self, stats):
+        '''
+        adds the counters of another cache (given by its get_stats), e.g. of a worker process
+        '''
+        self.hits += stats["eval_cache_hits"]
+        self.misses += stats["eval_cache_misses"]
@@ -0,0 +1,392 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides an in-memory index of the board history, which is loaded once per process,
+# and an append-only journal for writing new games to the history
+#
+
+import os
+import tempfile
+import time
+import threading
+import uuid
+import chess
+import chess.polyglot
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+HISTORY_FILE_LOC = "res/history.csv"
+BINARY_FILE_SUFFIX = ".npz"
+JOURNAL_FILE_SUFFIX = ".journal"
+COMPACTING_FILE_SUFFIX = ".compacting"
+LOCK_FILE_SUFFIX = ".lock"
+# first line of a journal and of the history file, so a compaction which has crashed after replacing the history file is recognized
+JOURNAL_ID_PREFIX = "# journal "
+MERGED_JOURNAL_ID_PREFIX = "# merged journal "
+COMPACTION_LOCK_FILE_SUFFIX = ".compaction.lock"
+
+# size of the journal in bytes, from which on it is merged into the history file
+COMPACTION_THRESHOLD = 1024 * 1024
+
+# seconds between two checks whether the history file has been changed
+RELOAD_CHECK_INTERVAL = 5
+
+ZOBRIST_HASHER = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+
+history_stores = {}
+
+
+def get_placement_key(board):
+    '''
+    returns the zobrist key of the piece placement of given board (without turn, castling rights and en passant square)
+    '''
+    return ZOBRIST_HASHER.hash_board(board)
+
+
+def get_placement_key_by_fen(board_fen):
+    '''
+    returns the zobrist key of given piece placement (first part of a fen string)
+    '''
+    return get_placement_key(chess.BaseBoard(board_fen))
+
+
+def get_history_store(history_location=HISTORY_FILE_LOC):
+    '''
+    returns the history store of given history file, it is shared by everything in this process
+    '''
+    if history_location not in history_stores:
+        history_stores[history_location] = HistoryStore(history_location)
+    return history_stores[history_location]
+
+
+class HistoryStore:
+    '''
+    hash index of the board history: key = zobrist key of piece placement, value = summed victory status
+    the history file is loaded on the first lookup and reloaded as soon as its modification time changes
+    if binary_cache is set, the index is additionally stored in a compact binary file next to the history file,
+    which is loaded instead of the csv file as long as it is not older than it
+    '''
+
+    def __init__(self, history_location=HISTORY_FILE_LOC, binary_cache=True):
+        self.history_location = history_location
+        self.binary_location = get_binary_location(history_location) if binary_cache else None
+        self.index = None
+        self.loaded_mtime = None
+        self.next_reload_check = 0
+
+    def get_value(self, board):
+        '''
+        returns stored value of the piece placement of given board
+        returns 0 if the board is not part of the history
+        '''
+        self.check_reload()
+        return self.index.get(get_placement_key(board), 0)
+
+    def check_reload(self):
+        '''
+        loads the history on first call and reloads it, if the history file or its journal has been changed
+        the files are checked at most every RELOAD_CHECK_INTERVAL seconds
+        '''
+        now = time.monotonic()
+        if self.index is not None and now < self.next_reload_check:
+            return
+        self.next_reload_check = now + RELOAD_CHECK_INTERVAL
+        mtime = self.get_mtimes()
+        if self.index is None or mtime != self.loaded_mtime:
+            self.load(mtime)
+
+    def get_mtimes(self):
+        return tuple(self.get_mtime(location) for location in get_history_files(self.history_location))
+
+    def load(self, mtime=None):
+        mtime = self.get_mtimes() if mtime is None else mtime
+        history_mtime = mtime[0]
+        self.index = None
+        if history_mtime is None:
+            self.index = {}
+        elif self.binary_location and (self.get_mtime(self.binary_location) or 0) >= history_mtime:
+            try:
+                self.index = self.read_binary(self.binary_location)
+            except (OSError, ValueError):
+                self.index = None
+        if self.index is None:
+            self.index = self.read_csv(self.history_location)
+            if self.binary_location:
+                self.update_binary(history_mtime)
+        # games which have not been merged into the history file yet
+        merged_journal_id = read_merged_journal_id(self.history_location)
+        for location in get_history_files(self.history_location)[1:]:
+            if is_merged_journal(location, merged_journal_id):
+                continue
+            for board_fen, value in read_journal(location):
+                key = get_placement_key_by_fen(board_fen)
+                self.index[key] = self.index.get(key, 0) + value
+        self.loaded_mtime = mtime
+
+    def update_binary(self, history_mtime):
+        '''
+        writes the index read from the history file with given modification time to the binary file
+        the binary file is not written while the history is compacted or if the history file has been changed meanwhile,
+        if it cannot be written, the index is only kept in memory
+        '''
+        try:
+            with HistoryLock(self.history_location, False, COMPACTION_LOCK_FILE_SUFFIX) as locked:
+                if locked and self.get_mtime(self.history_location) == history_mtime:
+                    self.write_binary(self.binary_location, self.index)
+        except OSError:
+            pass
+
+    @staticmethod
+    def get_mtime(location):
+        try:
+            return os.stat(location).st_mtime
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def read_csv(location):
+        '''
+        reads the history csv file (columns board and value) into a dictionary keyed by placement key
+        '''
+        dataset = pd.read_csv(location, usecols=['board', 'value'], comment='#')
+        index = {}
+        for board_fen, value in zip(dataset['board'].tolist(), dataset['value'].tolist()):
+            key = get_placement_key_by_fen(board_fen)
+            index[key] = index.get(key, 0) + value
+        return index
+
+    @staticmethod
+    def read_binary(location):
+        with np.load(location) as data:
+            return dict(zip(data['keys'].tolist(), data['values'].tolist()))
+
+    @staticmethod
+    def write_binary(location, index):
+        '''
+        writes the index as two arrays (keys and values), the file is replaced atomically
+        '''
+        os.replace(HistoryStore.write_binary_tmp(location, index), location)
+
+    @staticmethod
+    def write_binary_tmp(location, index):
+        '''
+        writes the index to a temporary file of its own next to given location
+        returns the location of the temporary file
+        '''
+        tmp_fd, tmp_location = tempfile.mkstemp(suffix=BINARY_FILE_SUFFIX, dir=os.path.dirname(location) or ".")
+        try:
+            with os.fdopen(tmp_fd, "wb") as tmp_file:
+                np.savez(tmp_file, keys=np.fromiter(index.keys(), dtype=np.uint64, count=len(index)),
+                    values=np.fromiter(index.values(), dtype=np.int64, count=len(index)))
+        except BaseException:
+            os.remove(tmp_location)
+            raise
+        return tmp_location
+
+
+def get_binary_location(history_location):
+    return os.path.splitext(history_location)[0] + BINARY_FILE_SUFFIX
+
+
+def get_history_files(history_location):
+    '''
+    returns locations of history file, journal and journal which is currently merged into the history file
+    '''
+    journal_location = history_location + JOURNAL_FILE_SUFFIX
+    return history_location, journal_location, journal_location + COMPACTING_FILE_SUFFIX
+
+
+class HistoryLock:
+    '''
+    exclusive lock on the history files, shared by all processes writing the history
+    the journal is locked by the lock file with LOCK_FILE_SUFFIX, the compaction by the one with COMPACTION_LOCK_FILE_SUFFIX
+    does not lock anything on systems without fcntl
+    '''
+
+    def __init__(self, history_location=HISTORY_FILE_LOC, blocking=True, lock_suffix=LOCK_FILE_SUFFIX):
+        self.lock_location = history_location + lock_suffix
+        self.blocking = blocking
+        self.lock_file = None
+
+    def __enter__(self):
+        self.lock_file = open(self.lock_location, "a")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self.lock_file, fcntl.LOCK_EX if self.blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                self.lock_file.close()
+                return False
+        return True
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.lock_file.closed:
+            if fcntl is not None:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+
+
+def read_header(location, prefix):
+    '''
+    returns the rest of the first line of given file, if it starts with given prefix
+    returns None otherwise or if the file does not exist
+    '''
+    try:
+        with open(location, "r") as header_file:
+            line = header_file.readline()
+    except FileNotFoundError:
+        return None
+    return line[len(prefix):].strip() if line.startswith(prefix) and line.endswith("\n") else None
+
+
+def read_journal_id(location):
+    return read_header(location, JOURNAL_ID_PREFIX)
+
+
+def read_merged_journal_id(history_location):
+    '''
+    returns the id of the journal which has been merged into given history file by the last compaction
+    '''
+    return read_header(history_location, MERGED_JOURNAL_ID_PREFIX)
+
+
+def is_merged_journal(location, merged_journal_id):
+    '''
+    returns True if given journal is already part of the history file with given merged journal id
+    (a compaction has replaced the history file, but not yet removed the journal)
+    '''
+    return not merged_journal_id is None and read_journal_id(location) == merged_journal_id
+
+
+def read_journal(location):
+    '''
+    returns list of (board, value) tuples of given journal
+    incomplete lines (e.g. of a crashed writer) and the id line are skipped
+    '''
+    entries = []
+    try:
+        with open(location, "r") as journal:
+            for line in journal:
+                if not line.endswith("\n") or line.startswith(JOURNAL_ID_PREFIX):
+                    continue
+                board_fen, _, value = line.rstrip("\n").partition(",")
+                try:
+                    entries.append((board_fen, int(value)))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return entries
+
+
+def append_game(turn_list, victory_status, history_location=HISTORY_FILE_LOC):
+    '''
+    appends all boards of a game with its victory status to the journal of the history
+    costs are independent of the size of the history, the journal is merged into the history file by compact_history
+    '''
+    append_games([(turn_list, victory_status)], history_location)
+
+
+def append_games(games, history_location=HISTORY_FILE_LOC):
+    '''
+    appends several games, given as list of (turn_list, victory_status) tuples, to the journal of the history
+    all games are written with a single lock and sync of the journal, a new journal gets an id in its first line
+    '''
+    lines = "".join("{},{}\n".format(board_fen, victory_status) for turn_list, victory_status in games for board_fen in dict.fromkeys(turn_list))
+    journal_location = get_history_files(history_location)[1]
+    with HistoryLock(history_location):
+        with open(journal_location, "a") as journal:
+            if journal.tell() == 0:
+                lines = "{}{}\n".format(JOURNAL_ID_PREFIX, uuid.uuid4().hex) + lines
+            journal.write(lines)
+            journal.flush()
+            os.fsync(journal.fileno())
+
+
+def needs_compaction(history_location=HISTORY_FILE_LOC, threshold=COMPACTION_THRESHOLD):
+    journal_location = get_history_files(history_location)[1]
+    return (HistoryStore.get_mtime(journal_location) is not None and os.path.getsize(journal_location) >= threshold) \
+        or os.path.exists(journal_location + COMPACTING_FILE_SUFFIX)
+
+
+def compact_history(history_location=HISTORY_FILE_LOC, blocking=True):
+    '''
+    merges the journal into the history file and sums the victory states
+    the new history file is written to a temporary file first and replaces the old one atomically
+    the journal is only locked while it is renamed, so games are appended to a new journal during the merge
+    the binary index is written together with the history file, so readers do not have to parse the new history file
+    the history file names the merged journal in its first line, so the journal is not merged twice,
+    if the compaction has crashed before removing it
+    returns False if another process is already compacting and blocking is not set
+    '''
+    history_location, journal_location, compacting_location = get_history_files(history_location)
+    with HistoryLock(history_location, blocking, COMPACTION_LOCK_FILE_SUFFIX) as locked:
+        if not locked:
+            return False
+        # a compacting journal left behind by a crashed compaction is merged first, unless it is already part of the history file
+        if is_merged_journal(compacting_location, read_merged_journal_id(history_location)):
+            os.remove(compacting_location)
+        if not os.path.exists(compacting_location):
+            with HistoryLock(history_location):
+                if not os.path.exists(journal_location):
+                    return True
+                os.replace(journal_location, compacting_location)
+
+        history_dict = {}
+        index = {}
+        binary_location = get_binary_location(history_location)
+        history_mtime = HistoryStore.get_mtime(history_location)
+        if not history_mtime is None:
+            history = pd.read_csv(history_location, usecols=['board', 'value'], comment='#')
+            history_dict = dict(zip(history['board'].tolist(), history['value'].tolist()))
+            # an up to date index only gets the boards of the journal, otherwise it is built from all boards once
+            index = None
+            if (HistoryStore.get_mtime(binary_location) or 0) >= history_mtime:
+                try:
+                    index = HistoryStore.read_binary(binary_location)
+                except (OSError, ValueError):
+                    pass
+        journal_id = read_journal_id(compacting_location)
+        journal = read_journal(compacting_location)
+        for board_fen, value in journal:
+            history_dict[board_fen] = history_dict.get(board_fen, 0) + value
+        index_entries = journal
+        if index is None:
+            index, index_entries = {}, history_dict.items()
+        for board_fen, value in index_entries:
+            key = get_placement_key_by_fen(board_fen)
+            index[key] = index.get(key, 0) + value
+
+        tmp_location = history_location + ".tmp"
+        merged_history = pd.DataFrame(list(history_dict.items()), columns=['board', 'value'])
+        with open(tmp_location, "w") as tmp_file:
+            if not journal_id is None:
+                tmp_file.write("{}{}\n".format(MERGED_JOURNAL_ID_PREFIX, journal_id))
+            merged_history.to_csv(tmp_file, index=False)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        tmp_binary_location = HistoryStore.write_binary_tmp(binary_location, index)
+        os.replace(tmp_location, history_location)
+        # the index is replaced after the history file, so it is not older than it
+        os.replace(tmp_binary_location, binary_location)
+        os.remove(compacting_location)
+    return True
+
+
+def compact_history_in_background(history_location=HISTORY_FILE_LOC):
+    '''
+    starts compaction of the history in a separate thread, if the journal has grown large enough
+    returns the thread or None if no compaction is needed
+    '''
+    if not needs_compaction(history_location):
+        return None
+    thread = threading.Thread(target=compact_history, args=(history_location, False))
+    thread.start()
+    return thread
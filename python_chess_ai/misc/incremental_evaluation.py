@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides an evaluator which updates material and piece position values on every move instead of rescanning the board
+#
+
+import chess
+import chess.polyglot
+import misc.ai_evaluation_lib as EvaluationLib
+
+
+def get_position_table(piece_type, color):
+    '''
+    returns the position matrix of given piece type and color as flat list indexed by square
+    uses the same orientation as EvaluationLib.get_position_value_by_square
+    '''
+    matrix = EvaluationLib.assign_piece_matrix(piece_type)
+    if color == chess.BLACK:
+        return [int(matrix[chess.square_rank(square), chess.square_file(square)]) for square in chess.SQUARES]
+    return [int(matrix[7 - chess.square_rank(square), 7 - chess.square_file(square)]) for square in chess.SQUARES]
+
+
+# POSITION_TABLES[color][piece_type][square]
+POSITION_TABLES = [[None] + [get_position_table(piece_type, color) for piece_type in chess.PIECE_TYPES] for color in (chess.BLACK, chess.WHITE)]
+PIECE_VALUES = [0] + [EvaluationLib.assign_piece_value(piece_type) for piece_type in chess.PIECE_TYPES]
+
+ZOBRIST_HASHER = chess.polyglot.ZobristHasher(chess.polyglot.POLYGLOT_RANDOM_ARRAY)
+# ZOBRIST_PIECE_KEYS[color][piece_type][square], same keys as chess.polyglot.zobrist_hash
+ZOBRIST_PIECE_KEYS = [[None] + [[chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * ((piece_type - 1) * 2 + color) + square] for square in chess.SQUARES]
+    for piece_type in chess.PIECE_TYPES] for color in (chess.BLACK, chess.WHITE)]
+
+
+class IncrementalEvaluator:
+    '''
+    keeps material and piece position sums of both colors and the zobrist key of the piece placement up to date while moves are pushed and popped
+    has to be initialized with set_board and afterwards every move has to be made through push and pop
+    '''
+
+    def __init__(self, board=None):
+        self.material = [0, 0]
+        self.positions = [0, 0]
+        self.piece_key = 0
+        self.stack = []
+        if not board is None:
+            self.set_board(board)
+
+    def set_board(self, board):
+        '''
+        calculates material and piece position sums and the zobrist key of given board from scratch
+        '''
+        self.material = [0, 0]
+        self.positions = [0, 0]
+        self.piece_key = ZOBRIST_HASHER.hash_board(board)
+        self.stack = []
+        for square, piece in board.piece_map().items():
+            self.material[piece.color] += PIECE_VALUES[piece.piece_type]
+            self.positions[piece.color] += POSITION_TABLES[piece.color][piece.piece_type][square]
+
+    def push(self, board, move):
+        '''
+        pushes move on given board and updates the sums by the moved, captured and promoted pieces
+        '''
+        self.stack.append((self.material[0], self.material[1], self.positions[0], self.positions[1], self.piece_key))
+
+        if move:
+            color = board.turn
+            opp_color = not color
+            piece_type = board.piece_type_at(move.from_square)
+            own_table = POSITION_TABLES[color]
+            own_keys = ZOBRIST_PIECE_KEYS[color]
+
+            if board.is_castling(move):
+                rook_file_from, rook_file_to = (7, 5) if board.is_kingside_castling(move) else (0, 3)
+                rank = chess.square_rank(move.from_square)
+                king_to = chess.square(6 if rook_file_from == 7 else 2, rank)
+                rook_from, rook_to = chess.square(rook_file_from, rank), chess.square(rook_file_to, rank)
+                self.positions[color] += own_table[chess.KING][king_to] - own_table[chess.KING][move.from_square]
+                self.positions[color] += own_table[chess.ROOK][rook_to] - own_table[chess.ROOK][rook_from]
+                self.piece_key ^= own_keys[chess.KING][move.from_square] ^ own_keys[chess.KING][king_to] \
+                    ^ own_keys[chess.ROOK][rook_from] ^ own_keys[chess.ROOK][rook_to]
+            else:
+                captured_square = move.to_square
+                if board.is_en_passant(move):
+                    captured_square = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+                captured_type = board.piece_type_at(captured_square)
+                if captured_type:
+                    self.material[opp_color] -= PIECE_VALUES[captured_type]
+                    self.positions[opp_color] -= POSITION_TABLES[opp_color][captured_type][captured_square]
+                    self.piece_key ^= ZOBRIST_PIECE_KEYS[opp_color][captured_type][captured_square]
+
+                new_type = move.promotion or piece_type
+                self.positions[color] += own_table[new_type][move.to_square] - own_table[piece_type][move.from_square]
+                self.piece_key ^= own_keys[piece_type][move.from_square] ^ own_keys[new_type][move.to_square]
+                if move.promotion:
+                    self.material[color] += PIECE_VALUES[move.promotion] - PIECE_VALUES[piece_type]
+
+        board.push(move)
+
+    def pop(self, board):
+        '''
+        pops the last move of given board and restores the sums from before this move
+        '''
+        board.pop()
+        material_white, material_black, positions_white, positions_black, self.piece_key = self.stack.pop()
+        self.material = [material_white, material_black]
+        self.positions = [positions_white, positions_black]
+
+    def get_zobrist_key(self, board):
+        '''
+        same as chess.polyglot.zobrist_hash: the key of the piece placement is kept up to date,
+        only castling rights, en passant square and turn are hashed on every call
+        '''
+        return self.piece_key ^ ZOBRIST_HASHER.hash_castling(board) ^ ZOBRIST_HASHER.hash_ep_square(board) ^ ZOBRIST_HASHER.hash_turn(board)
+
+    def get_value_by_color(self, board, color, count_king=True):
+        '''
+        same as EvaluationLib.get_value_by_color
+        '''
+        if count_king:
+            return self.material[color]
+        return self.material[color] - PIECE_VALUES[chess.KING] * len(board.pieces(chess.KING, color))
+
+    def get_board_value(self, board, color, count_king=True):
+        '''
+        same as EvaluationLib.get_board_value
+        '''
+        white_value = self.get_value_by_color(board, chess.WHITE, count_king)
+        black_value = self.get_value_by_color(board, chess.BLACK, count_king)
+
+        return white_value - black_value if color is chess.WHITE else black_value - white_value
+
+    def get_board_positions_value(self, board, color):
+        '''
+        same as EvaluationLib.get_board_positions_value
+        '''
+        return self.positions[color] / 100
+
+    def get_opp_board_positions_value(self, board, color):
+        '''
+        same as EvaluationLib.get_opp_board_positions_value
+        '''
+        return -1 * self.positions[not color] / 100
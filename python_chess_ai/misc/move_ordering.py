@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides the move ordering of the search: transposition table move, captures, killer moves and history heuristic
+#
+
+import chess
+import misc.ai_evaluation_lib as EvaluationLib
+
+MAX_PLY = 128
+KILLERS_PER_PLY = 2
+
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+# history scores are kept below the killer scores
+MAX_HISTORY_SCORE = KILLER_SCORE - 1
+
+PIECE_VALUES = [0] + [EvaluationLib.assign_piece_value(piece_type) for piece_type in chess.PIECE_TYPES]
+
+
+class MoveOrderer:
+    '''
+    orders the moves of a node: move of the transposition table first,
+    then captures by most valuable victim / least valuable attacker (MVV-LVA),
+    then killer moves (quiet moves which caused a cutoff at the same ply)
+    and then all other moves by history heuristic (quiet moves which caused cutoffs anywhere, weighted by depth)
+    '''
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.killers = [[None] * KILLERS_PER_PLY for _ in range(MAX_PLY)]
+        # history[color][from_square * 64 + to_square]
+        self.history = [[0] * 4096, [0] * 4096]
+        self.reset_stats()
+
+    def new_search(self, plies=0):
+        '''
+        keeps killer moves and history for the next search of the same game:
+        killer moves are moved by the plies played since the last search, so they stay at the same board, history scores are halved
+        '''
+        if plies > 0:
+            self.killers = self.killers[plies:] + [[None] * KILLERS_PER_PLY for _ in range(min(plies, MAX_PLY))]
+        self.age_history()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def order_moves(self, board, ply, tt_move=None):
+        '''
+        returns list of legal moves of given board, ordered by their scores
+        '''
+        killers = self.killers[ply] if ply < MAX_PLY else ()
+        history = self.history[board.turn]
+        scored_moves = []
+        for move in board.legal_moves:
+            if move == tt_move:
+                score = TT_MOVE_SCORE
+            elif board.is_capture(move):
+                score = CAPTURE_SCORE + self.get_capture_score(board, move)
+            elif move in killers:
+                score = KILLER_SCORE - killers.index(move)
+            else:
+                score = history[move.from_square * 64 + move.to_square]
+                if move.promotion:
+                    score += 16 * PIECE_VALUES[move.promotion]
+            scored_moves.append((score, move))
+        scored_moves.sort(key=lambda scored_move: scored_move[0], reverse=True)
+        return [move for _, move in scored_moves]
+
+    def order_captures(self, board):
+        '''
+        returns list of legal captures and promotions of given board, ordered by MVV-LVA
+        '''
+        moves = list(board.generate_legal_captures())
+        moves.extend(move for move in board.generate_legal_moves(board.pawns, chess.BB_BACKRANKS) if not board.is_capture(move))
+        moves.sort(key=lambda move: self.get_capture_score(board, move), reverse=True)
+        return moves
+
+    @staticmethod
+    def get_capture_score(board, move):
+        '''
+        returns MVV-LVA score of a capture (value of the captured piece first, value of the capturing piece second),
+        the value of the new piece is added for promotions
+        '''
+        score = 0
+        if board.is_capture(move):
+            victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+            score = 16 * PIECE_VALUES[victim] - PIECE_VALUES[board.piece_type_at(move.from_square)]
+        if move.promotion:
+            score += 16 * PIECE_VALUES[move.promotion]
+        return score
+
+    @staticmethod
+    def get_material_gain(board, move):
+        '''
+        returns the material won by a capture or promotion, if the moved piece is not recaptured
+        '''
+        gain = 0
+        if board.is_capture(move):
+            gain = PIECE_VALUES[chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)]
+        if move.promotion:
+            gain += PIECE_VALUES[move.promotion] - PIECE_VALUES[chess.PAWN]
+        return gain
+
+    def record_cutoff(self, board, move, ply, depth, move_num):
+        '''
+        records a move which caused a cutoff at given ply and remaining depth
+        move_num is the position of the move in the ordered move list
+        '''
+        self.cutoffs += 1
+        if move_num == 0:
+            self.first_move_cutoffs += 1
+        if board.is_capture(move) or move.promotion:
+            return
+
+        if ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1:] = killers[:-1]
+                killers[0] = move
+
+        history = self.history[board.turn]
+        index = move.from_square * 64 + move.to_square
+        history[index] += depth * depth
+        if history[index] > MAX_HISTORY_SCORE:
+            self.age_history()
+
+    def age_history(self):
+        '''
+        halves all history scores, so newer cutoffs outweigh older ones
+        '''
+        for history in self.history:
+            for index in range(len(history)):
+                history[index] //= 2
+
+    def get_stats(self):
+        return {
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs > 0 else 0
+        }
+
+    def add_stats(self, stats):
+        '''
+        adds the counters of another move orderer (given by its get_stats), e.g. of a worker process
+        '''
+        self.cutoffs += stats["cutoffs"]
+        self.first_move_cutoffs += stats["first_move_cutoffs"]
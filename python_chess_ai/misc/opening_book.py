@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides a polyglot opening book, which is memory-mapped and indexed once per process
+#
+
+import os
+import errno
+import mmap
+import random
+import chess
+import chess.polyglot
+import numpy as np
+
+OPENING_BOOK_LOC = "res/polyglot/Performance.bin"
+
+# polyglot entries: zobrist key, move, weight and learn value, all big endian
+ENTRY_DTYPE = np.dtype([("key", ">u8"), ("move", ">u2"), ("weight", ">u2"), ("learn", ">u4")])
+
+opening_books = {}
+
+
+def get_opening_book(book_location=OPENING_BOOK_LOC):
+    '''
+    returns the opening book of given file, it is opened once and shared by all players of this process
+    raise an error if system cannot find the opening-book file
+    '''
+    if book_location not in opening_books:
+        opening_books[book_location] = OpeningBook(book_location)
+    return opening_books[book_location]
+
+
+def decode_move(board, raw_move):
+    '''
+    returns the move of a polyglot entry on given board
+    polyglot encodes castling as king captures own rook, which is converted to the king move
+    '''
+    to_square = raw_move & 0x3F
+    from_square = (raw_move >> 6) & 0x3F
+    promotion_part = (raw_move >> 12) & 0x7
+    if board.piece_type_at(from_square) == chess.KING and board.piece_at(to_square) == chess.Piece(chess.ROOK, board.turn):
+        to_file = 6 if chess.square_file(to_square) > chess.square_file(from_square) else 2
+        to_square = chess.square(to_file, chess.square_rank(from_square))
+    return chess.Move(from_square, to_square, promotion_part + 1 if promotion_part else None)
+
+
+class OpeningBook:
+    '''
+    read-only polyglot opening book: the file is memory-mapped, so all processes share its pages,
+    and the keys are copied into a sorted array, which is searched by bisection
+    '''
+
+    def __init__(self, book_location=OPENING_BOOK_LOC):
+        if not os.path.isfile(book_location):
+            raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), book_location)
+        self.book_location = book_location
+        with open(book_location, "rb") as book_file:
+            self.mmap = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.entries = np.frombuffer(self.mmap, dtype=ENTRY_DTYPE, count=len(self.mmap) // ENTRY_DTYPE.itemsize)
+        keys = self.entries["key"].astype(np.uint64)
+        # polyglot books are sorted by key, unsorted books get an index of sorted entry positions
+        self.order = None if np.all(keys[:-1] <= keys[1:]) else np.argsort(keys, kind="stable")
+        self.keys = keys if self.order is None else keys[self.order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def find_all(self, board, minimum_weight=1):
+        '''
+        returns list of (move, weight) tuples of all legal book moves of given board, ordered by weight
+        '''
+        key = np.uint64(chess.polyglot.zobrist_hash(board))
+        start = np.searchsorted(self.keys, key, side="left")
+        end = np.searchsorted(self.keys, key, side="right")
+        positions = range(start, end) if self.order is None else self.order[start:end]
+        moves = []
+        for position in positions:
+            entry = self.entries[position]
+            weight = int(entry["weight"])
+            move = decode_move(board, int(entry["move"]))
+            if weight >= minimum_weight and board.is_legal(move):
+                moves.append((move, weight))
+        moves.sort(key=lambda book_move: book_move[1], reverse=True)
+        return moves
+
+    def find(self, board, minimum_weight=1):
+        '''
+        returns the book move with the highest weight, None if the board is not part of the book
+        '''
+        moves = self.find_all(board, minimum_weight)
+        return moves[0][0] if moves else None
+
+    def weighted_choice(self, board, random_generator=random):
+        '''
+        returns a random book move, chosen with a probability proportional to its weight
+        returns None if the board is not part of the book
+        '''
+        moves = self.find_all(board)
+        if not moves:
+            return None
+        return random_generator.choices([move for move, _ in moves], weights=[weight for _, weight in moves])[0]
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides the probing of syzygy tablebases for the search: cached wdl probes and dtz probes with statistics
+#
+
+import os
+import chess
+import chess.syzygy
+import misc.evaluation_cache as EvaluationCache
+import misc.time_manager as TimeManager
+
+SYZYGY_LOC = "res/syzygy"
+WDL_FILE_SUFFIX = ".rtbw"
+
+PROBE_CACHE_SIZE_MB = 1
+
+# stored in the probe cache for boards whose table is missing
+MISSING_TABLE = float('nan')
+
+
+tablebases = {}
+
+
+def get_tablebase(syzygy_location=SYZYGY_LOC):
+    '''
+    returns the syzygy tablebase of given directory, it is opened on first use and shared by everything in this process
+    the table files are memory-mapped on their first probe, so processes share their pages
+    '''
+    if syzygy_location not in tablebases:
+        tablebases[syzygy_location] = chess.syzygy.open_tablebase(syzygy_location)
+    return tablebases[syzygy_location]
+
+
+def get_max_pieces(syzygy_location):
+    '''
+    returns the largest number of pieces (including kings) of the wdl tables in given directory, read from the file names
+    '''
+    table_names = [file_name[:-len(WDL_FILE_SUFFIX)] for file_name in os.listdir(syzygy_location) if file_name.endswith(WDL_FILE_SUFFIX)]
+    return max((len(table_name) - 1 for table_name in table_names), default=0)
+
+
+class TablebaseProber:
+    '''
+    probes the syzygy tablebase of a directory for boards with few enough pieces and without castling rights
+    the tablebase is not opened before the first probe, only the names of its tables are read beforehand
+    wdl results (2 win, 1 win prevented by the fifty move rule, 0 draw, -1 and -2 the same for losses, all from the view of the side to move)
+    are cached by zobrist key, boards whose table is missing are cached as well
+    dtz probes are not cached, they are only needed to choose the move at the root
+    '''
+
+    def __init__(self, syzygy_location=SYZYGY_LOC, cache_size_mb=PROBE_CACHE_SIZE_MB):
+        self.syzygy_location = syzygy_location
+        self.max_pieces = get_max_pieces(syzygy_location)
+        self.tablebase = None
+        self.cache = EvaluationCache.EvaluationCache(cache_size_mb)
+        self.reset_stats()
+
+    def __getstate__(self):
+        '''
+        the tablebase is not handed over to other processes, they open it on their first probe
+        '''
+        state = self.__dict__.copy()
+        state["tablebase"] = None
+        return state
+
+    def get_tablebase(self):
+        if self.tablebase is None:
+            self.tablebase = get_tablebase(self.syzygy_location)
+        return self.tablebase
+
+    def reset_stats(self):
+        self.wdl_probes = 0
+        self.dtz_probes = 0
+        self.failed_probes = 0
+        self.probe_time = 0
+        self.cache.reset_stats()
+
+    def can_probe(self, board):
+        return chess.popcount(board.occupied) <= self.max_pieces and not board.castling_rights
+
+    def probe_wdl(self, board, key):
+        '''
+        returns the wdl value of given board with given zobrist key
+        returns None if the board cannot be probed or its table is missing
+        '''
+        if not self.can_probe(board):
+            return None
+        wdl = self.cache.probe(key)
+        if wdl is None:
+            self.wdl_probes += 1
+            wdl = self.probe(self.get_tablebase().probe_wdl, board)
+            wdl = MISSING_TABLE if wdl is None else wdl
+            self.cache.store(key, wdl)
+        return None if wdl != wdl else int(wdl)
+
+    def probe_dtz(self, board):
+        '''
+        returns the distance to the next zeroing move (capture or pawn move) of given board, signed like the wdl value
+        returns None if the board cannot be probed or its table is missing
+        '''
+        if not self.can_probe(board):
+            return None
+        self.dtz_probes += 1
+        return self.probe(self.get_tablebase().probe_dtz, board)
+
+    def probe(self, probe_func, board):
+        '''
+        calls given probe function of the tablebase and measures its time
+        returns None if the table is missing
+        '''
+        start = TimeManager.get_time()
+        try:
+            return probe_func(board)
+        except KeyError:
+            self.failed_probes += 1
+            return None
+        finally:
+            self.probe_time += TimeManager.get_time() - start
+
+    def get_root_move(self, board):
+        '''
+        chooses the move of given board by the dtz values after each move:
+        wins are converted as fast as possible, losses are delayed as long as possible
+        returns None if the board cannot be probed or not all moves can be rated
+        '''
+        if not self.can_probe(board):
+            return None
+        best_move = None
+        best_rating = None
+        for move in board.legal_moves:
+            board.push(move)
+            checkmate = board.is_checkmate()
+            dtz = None if checkmate else self.get_move_dtz(board)
+            board.pop()
+            if checkmate:
+                return move
+            if dtz is None:
+                return None
+            # wins with the smallest dtz and losses with the largest distance (most negative dtz) are rated best
+            rating = (-1 if dtz < 0 else (1 if dtz > 0 else 0), -dtz)
+            if best_rating is None or rating > best_rating:
+                best_move, best_rating = move, rating
+        return best_move
+
+    def get_move_dtz(self, board):
+        '''
+        returns the dtz of the move which led to given board from the view of the side which played it
+        a zeroing move (capture or pawn move) resets the count, so its dtz is the distance before zeroing (1 for a win)
+        instead of the dtz after it, which would rate it worse than every move which only promises to zero later
+        returns None if the table is missing
+        '''
+        if board.halfmove_clock == 0:
+            wdl = self.probe(self.get_tablebase().probe_wdl, board)
+            self.wdl_probes += 1
+            # a win or loss which is spoiled by the fifty move rule is rated behind all others
+            return None if wdl is None else {2: -1, 1: -101, 0: 0, -1: 101, -2: 1}[wdl]
+        dtz = self.probe_dtz(board)
+        if dtz is None:
+            return None
+        # dtz is from the view of the opponent, one ply is added for the move itself
+        return -dtz - 1 if dtz > 0 else (-dtz + 1 if dtz < 0 else 0)
+
+    def get_stats(self):
+        '''
+        returns counters since the last reset
+        '''
+        return {
+            "tb_wdl_probes": self.wdl_probes,
+            "tb_dtz_probes": self.dtz_probes,
+            "tb_failed_probes": self.failed_probes,
+            "tb_cache_hits": self.cache.hits,
+            "tb_probe_time": self.probe_time,
+            "tb_avg_probe_time": self.probe_time / (self.wdl_probes + self.dtz_probes) if self.wdl_probes + self.dtz_probes > 0 else 0
+        }
+
+    def add_stats(self, stats):
+        '''
+        adds the counters of another prober (given by its get_stats), e.g. of a worker process
+        '''
+        self.wdl_probes += stats["tb_wdl_probes"]
+        self.dtz_probes += stats["tb_dtz_probes"]
+        self.failed_probes += stats["tb_failed_probes"]
+        self.cache.hits += stats["tb_cache_hits"]
+        self.probe_time += stats["tb_probe_time"]
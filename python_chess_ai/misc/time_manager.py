@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides the time management of the search: time budget per move, game clocks and iteration prediction
+#
+
+import time
+
+# number of moves the remaining time of a game clock is divided by, if the number of moves to go is unknown
+DEFAULT_MOVES_TO_GO = 30
+# share of the increment which is added to the time budget of a move
+INCREMENT_SHARE = 0.75
+# the hard deadline is at most this multiple of the time budget of a move ...
+MAX_BUDGET_FACTOR = 3
+# ... and at most this share of the remaining time
+MAX_REMAINING_SHARE = 0.5
+# seconds kept back for communication and move output
+MOVE_OVERHEAD = 0.05
+MIN_MOVE_TIME = 0.01
+# assumed growth of the search time per iteration, as long as it cannot be measured
+DEFAULT_BRANCHING_FACTOR = 6
+
+
+def get_time():
+    '''
+    monotonic high resolution clock, used for all deadlines of the search
+    '''
+    return time.perf_counter()
+
+
+class TimeManager:
+    '''
+    calculates the deadlines of a search from a fixed time per move or from a game clock (remaining time, increment, moves to go)
+    the soft deadline is the time budget of a move: no new iteration is started if it is predicted to end after it
+    the hard deadline is the point in time at which a running search is stopped
+    '''
+
+    def __init__(self, move_time=None):
+        self.move_time = move_time
+        self.remaining = None
+        self.increment = 0
+        self.moves_to_go = None
+        self.start_time = None
+        self.soft_deadline = float('inf')
+        self.deadline = float('inf')
+        self.iteration_start = None
+        self.iteration_times = []
+
+    def set_move_time(self, move_time):
+        '''
+        sets a fixed time per move in seconds (None for no limit), is used as long as no game clock is set
+        '''
+        self.move_time = move_time
+
+    def set_game_clock(self, remaining, increment=0, moves_to_go=None):
+        '''
+        sets the remaining time of the game clock in seconds, the increment per move and the number of moves until the next time control
+        '''
+        self.remaining = remaining
+        self.increment = increment
+        self.moves_to_go = moves_to_go
+
+    def clear_game_clock(self):
+        self.remaining = None
+        self.increment = 0
+        self.moves_to_go = None
+
+    def start(self):
+        '''
+        starts the time measurement of a search and calculates its deadlines
+        returns the hard deadline
+        '''
+        self.start_time = get_time()
+        self.iteration_start = self.start_time
+        self.iteration_times = []
+        soft_limit, hard_limit = self.get_time_limits()
+        self.soft_deadline = self.start_time + soft_limit
+        self.deadline = self.start_time + hard_limit
+        return self.deadline
+
+    def get_time_limits(self):
+        '''
+        returns time budget and maximum time of the next move in seconds
+        '''
+        if self.remaining is None:
+            move_time = float('inf') if self.move_time is None else self.move_time
+            return move_time, move_time
+        available = max(MIN_MOVE_TIME, self.remaining - MOVE_OVERHEAD)
+        budget = self.remaining / (self.moves_to_go or DEFAULT_MOVES_TO_GO) + INCREMENT_SHARE * self.increment
+        hard_limit = max(MIN_MOVE_TIME, min(budget * MAX_BUDGET_FACTOR, available * MAX_REMAINING_SHARE, available))
+        return min(budget, hard_limit), hard_limit
+
+    def stop(self):
+        '''
+        stops the time measurement of a search and books the used time on the game clock
+        returns the used time in seconds
+        '''
+        used_time = self.get_elapsed_time()
+        if not self.remaining is None:
+            self.remaining = self.remaining - used_time + self.increment
+            if not self.moves_to_go is None:
+                self.moves_to_go = max(1, self.moves_to_go - 1)
+        return used_time
+
+    def get_elapsed_time(self):
+        return get_time() - self.start_time
+
+    def is_time_up(self):
+        return get_time() >= self.deadline
+
+    def finish_iteration(self):
+        '''
+        records the duration of a completed iteration of the iterative deepening
+        '''
+        now = get_time()
+        self.iteration_times.append(now - self.iteration_start)
+        self.iteration_start = now
+
+    def get_branching_factor(self):
+        '''
+        returns the growth of the search time per iteration, averaged over the last two iterations
+        since odd and even depths grow differently, a single ratio would mispredict every second iteration
+        '''
+        times = self.iteration_times[-3:]
+        if len(times) == 3 and times[0] > 0 and times[1] > 0:
+            return max(1, (times[2] / times[0]) ** 0.5)
+        return DEFAULT_BRANCHING_FACTOR
+
+    def can_start_iteration(self):
+        '''
+        returns True if the next iteration is predicted to end before the soft deadline
+        the duration is predicted by the duration of the last iteration multiplied with the branching factor
+        '''
+        now = get_time()
+        if now >= self.soft_deadline:
+            return False
+        if not self.iteration_times:
+            return True
+        return now + self.iteration_times[-1] * self.get_branching_factor() <= self.soft_deadline
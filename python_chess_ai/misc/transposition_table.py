@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides a transposition table keyed on the zobrist hash of a board
+#
+
+import chess
+import ctypes
+import multiprocessing
+import struct
+import numpy as np
+
+DEFAULT_SIZE_MB = 16
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+# every entry consists of three 64 bit words: check word (zobrist key xor data xor value), packed data and value
+ENTRY_WORDS = 3
+ENTRY_BYTES = ENTRY_WORDS * 8
+
+# layout of the packed data word
+DEPTH_BITS = 8
+FLAG_SHIFT = 8
+MOVE_SHIFT = 10
+AGE_SHIFT = 26
+VALID_BIT = 1 << 34
+
+DEPTH_MASK = (1 << DEPTH_BITS) - 1
+FLAG_MASK = 0x3
+MOVE_MASK = 0xFFFF
+AGE_MASK = 0xFF
+
+DOUBLE_STRUCT = struct.Struct("<d")
+WORD_STRUCT = struct.Struct("<Q")
+
+
+def encode_move(move):
+    '''
+    packs a move into 16 bits (from square, to square and promotion piece type)
+    returns 0 if there is no move
+    '''
+    if move is None:
+        return 0
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def decode_move(move_code):
+    '''
+    unpacks a move packed by encode_move
+    returns None if there is no move
+    '''
+    if move_code == 0:
+        return None
+    return chess.Move(move_code & 0x3F, (move_code >> 6) & 0x3F, (move_code >> 12) or None)
+
+
+def value_to_word(value):
+    return WORD_STRUCT.unpack(DOUBLE_STRUCT.pack(value))[0]
+
+
+def word_to_value(word):
+    return DOUBLE_STRUCT.unpack(WORD_STRUCT.pack(word))[0]
+
+
+class TranspositionTable:
+    '''
+    fixed size hash table which stores search results (depth, bound type, value and best move) by zobrist key
+    an entry is replaced if it belongs to an older search or if the new result was searched at least as deep
+    if shared is set, the table is placed in shared memory and can be used by several processes at the same time,
+    it is handed over to child processes on their creation (e.g. as argument of a pool initializer)
+    entries are written without locking, torn entries of concurrent writes are detected by the check word
+    '''
+
+    def __init__(self, size_mb=DEFAULT_SIZE_MB, shared=False):
+        self.size_mb = size_mb
+        self.num_entries = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.shared = shared
+        self.buffer = multiprocessing.RawArray(ctypes.c_uint64, self.num_entries * ENTRY_WORDS) if shared else None
+        self.table = self.create_table()
+        self.age = 0
+        self.reset_stats()
+
+    def create_table(self):
+        if self.buffer is None:
+            return np.zeros(self.num_entries * ENTRY_WORDS, dtype=np.uint64)
+        return np.frombuffer(self.buffer, dtype=np.uint64)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["table"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.table = self.create_table()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        '''
+        starts a new search: entries of previous searches become replaceable and counters are reset
+        '''
+        self.age = (self.age + 1) & AGE_MASK
+        self.reset_stats()
+
+    def clear(self):
+        self.table.fill(0)
+        self.age = 0
+        self.reset_stats()
+
+    def probe(self, key):
+        '''
+        returns tuple (depth, flag, value, move) stored for the given zobrist key
+        returns None if there is no entry for this key
+        '''
+        index = (key % self.num_entries) * ENTRY_WORDS
+        check, data, value_word = self.table[index:index + ENTRY_WORDS].tolist()
+        if not data & VALID_BIT:
+            self.misses += 1
+            return None
+        if check ^ data ^ value_word != key:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return (data & DEPTH_MASK,
+                (data >> FLAG_SHIFT) & FLAG_MASK,
+                word_to_value(value_word),
+                decode_move((data >> MOVE_SHIFT) & MOVE_MASK))
+
+    def store(self, key, depth, flag, value, move):
+        '''
+        stores a search result for the given zobrist key, if the replacement policy allows it
+        '''
+        index = (key % self.num_entries) * ENTRY_WORDS
+        old_check, old_data, old_value_word = self.table[index:index + ENTRY_WORDS].tolist()
+        if old_data & VALID_BIT and old_check ^ old_data ^ old_value_word != key \
+                and (old_data >> AGE_SHIFT) & AGE_MASK == self.age and old_data & DEPTH_MASK > depth:
+            return
+        data = VALID_BIT | (self.age << AGE_SHIFT) | (encode_move(move) << MOVE_SHIFT) | (flag << FLAG_SHIFT) | min(depth, DEPTH_MASK)
+        value_word = value_to_word(value)
+        self.table[index:index + ENTRY_WORDS] = (key ^ data ^ value_word, data, value_word)
+        self.stores += 1
+
+    def get_stats(self):
+        '''
+        returns counters of the current search
+        '''
+        probes = self.hits + self.misses
+        return {
+            "tt_hits": self.hits,
+            "tt_misses": self.misses,
+            "tt_collisions": self.collisions,
+            "tt_stores": self.stores,
+            "tt_hit_rate": self.hits / probes if probes > 0 else 0
+        }
+
+    def add_stats(self, stats):
+        '''
+        adds the counters of another table (given by its get_stats), e.g. of a worker process
+        '''
+        self.hits += stats["tt_hits"]
+        self.misses += stats["tt_misses"]
+        self.collisions += stats["tt_collisions"]
+        self.stores += stats["tt_stores"]
@@ -11,19 +11,60 @@ from player.interface import PlayerInterface
 
 import misc.tools as Tools
 import misc.ai_evaluation_lib as EvaluationLib
-from functools import lru_cache
+import misc.transposition_table as TranspositionTable
+import misc.incremental_evaluation as IncrementalEvaluation
+import misc.time_manager as TimeManager
+import misc.move_ordering as MoveOrdering
+import misc.evaluation_cache as EvaluationCache
+import misc.opening_book as OpeningBook
+import misc.tablebase as Tablebase
 from player.user_input import terminal, gui
 import chess
-import chess.polyglot
-import chess.syzygy
-import time
 import os
 import errno
+import ctypes
+import random
+import threading
+import multiprocessing
 
 OPENING_BOOK_LOC = "res/polyglot/Performance.bin"
 SYZYGY_LOC = "res/syzygy"
 
 MAX_BOARD_VALUE = float("inf")
+# value of a position won according to the tablebase, above every evaluation but below a mate
+TABLEBASE_WIN_VALUE = 100000
+
+# limits of the quiescence search per leaf (plies and nodes)
+QUIESCENCE_MAX_DEPTH = 8
+QUIESCENCE_MAX_NODES = 256
+# captures are skipped in the quiescence search if even the captured piece plus this margin (in piece values) cannot raise the value to alpha
+DELTA_MARGIN = 2
+
+# moves after the first one are searched with a null window of this width and only re-searched if they turn out better
+NULL_WINDOW = 1e-9
+# from this depth on, iterations are searched in a window around the value of the previous iteration (in piece values)
+ASPIRATION_MIN_DEPTH = 3
+ASPIRATION_WINDOW = 0.5
+# factor the window is widened by, if the value falls outside of it
+ASPIRATION_GROWTH = 4
+
+# null move pruning: the side to move passes and the node is cut off if a search reduced by this depth still fails high
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+# late move reductions: quiet moves late in the move order are searched with reduced depth first
+LMR_REDUCTION = 1
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE_NUM = 3
+
+TRANSPOSITION_TABLE_SIZE_MB = 16
+EVALUATION_CACHE_SIZE_MB = 4
+
+# root moves searched by other workers are searched against the best value found so far minus this margin,
+# so equally rated moves still get an exact value and the same move as in the serial search is chosen
+ROOT_SPLIT_MARGIN = 1e-9
+
+# number of nodes between two checks of the clock
+TIME_CHECK_NODES = 64
 
 MAX_DEPTH_START = 4
 BOARD_VALUE_FACTOR_START = 50
@@ -64,7 +105,9 @@ class Player(PlayerInterface):
     def __init__(self, num, name, ui_status, difficulty, 
         board_value_fact_start = BOARD_VALUE_FACTOR_START, attacked_pieces_fact_start = ATTACKED_PIECES_FACTOR_START, board_positions_fact_start = BOARD_POSITIONS_FACTOR_START, opp_board_positions_fact_start = OPP_BOARD_POSITIONS_FACTOR_START, king_safety_fact_start = KING_SAFETY_FACTOR_START, opp_king_safety_fact_start = OPP_KING_SAFETY_FACTOR_START, mobility_fact_start = MOBILITY_FACTOR_START, history_fact_start = HISTORY_FACTOR_START, max_depth_start = MAX_DEPTH_START,
         board_value_fact_mid = BOARD_VALUE_FACTOR_MID, attacked_pieces_fact_mid = ATTACKED_PIECES_FACTOR_MID, board_positions_fact_mid = BOARD_POSITIONS_FACTOR_MID, opp_board_positions_fact_mid = OPP_BOARD_POSITIONS_FACTOR_MID, king_safety_fact_mid = KING_SAFETY_FACTOR_MID, opp_king_safety_fact_mid = OPP_KING_SAFETY_FACTOR_MID, mobility_fact_mid = MOBILITY_FACTOR_MID, history_fact_mid = HISTORY_FACTOR_MID, max_depth_mid = MAX_DEPTH_MID,
-        board_value_fact_end = BOARD_VALUE_FACTOR_END, attacked_pieces_fact_end = ATTACKED_PIECES_FACTOR_END, board_positions_fact_end = BOARD_POSITIONS_FACTOR_END, opp_board_positions_fact_end = OPP_BOARD_POSITIONS_FACTOR_END, king_safety_fact_end = KING_SAFETY_FACTOR_END, opp_king_safety_fact_end = OPP_KING_SAFETY_FACTOR_END, mobility_fact_end = MOBILITY_FACTOR_END, history_fact_end = HISTORY_FACTOR_END, max_depth_end = MAX_DEPTH_END):
+        board_value_fact_end = BOARD_VALUE_FACTOR_END, attacked_pieces_fact_end = ATTACKED_PIECES_FACTOR_END, board_positions_fact_end = BOARD_POSITIONS_FACTOR_END, opp_board_positions_fact_end = OPP_BOARD_POSITIONS_FACTOR_END, king_safety_fact_end = KING_SAFETY_FACTOR_END, opp_king_safety_fact_end = OPP_KING_SAFETY_FACTOR_END, mobility_fact_end = MOBILITY_FACTOR_END, history_fact_end = HISTORY_FACTOR_END, max_depth_end = MAX_DEPTH_END,
+        hash_size_mb = TRANSPOSITION_TABLE_SIZE_MB, workers = 1, smp_helpers = 0, quiescence = True, null_move_pruning = None, late_move_reductions = None,
+        evaluation_cache_size_mb = EVALUATION_CACHE_SIZE_MB, ponder = False):
         
         super().__init__(num, name, ui_status, difficulty)
         
@@ -99,157 +142,874 @@ class Player(PlayerInterface):
         self.max_depth_end = max_depth_end
 
         self.difficulty = difficulty
+        self.evaluator = IncrementalEvaluation.IncrementalEvaluator()
+        self.move_orderer = MoveOrdering.MoveOrderer()
+        self.root_ply = 0
         self.evaluation_funcs_dict = self.get_evaluation_funcs_by_dif(2, self.difficulty)
+        self.evaluation_funcs_status = 2
 
         self.opening_book = self.import_opening_book(OPENING_BOOK_LOC)
-        self.syzygy = self.import_syzygy(SYZYGY_LOC)
+        self.tablebase = self.import_syzygy(SYZYGY_LOC)
         
         self.time_limit = self.get_timeout_by_dif(difficulty)
+        self.time_manager = TimeManager.TimeManager(self.time_limit)
+        self.search_stopped = False
+        self.next_time_check = 0
+        # set by another thread to stop the running search (see stop), limits of the search which replace the difficulty defaults
+        self.stop_requested = False
+        self.max_depth = None
+        self.max_nodes = None
+        # called with the search info of every completed iteration of the iterative deepening
+        self.info_callback = None
+        self.hash_size_mb = hash_size_mb
+        self.search_info = {}
+        self.game_status = 2
+        self.counter = 0
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        # leaves of the search are extended by captures, promotions and check evasions until they are quiet
+        self.quiescence = quiescence
+        self.quiescence_budget = 0
+        self.pawn_value = 0
+        self.principal_variation = []
+        # pruning features of the search, by default set by difficulty
+        search_features = self.get_search_features_by_dif(difficulty)
+        self.null_move_pruning = search_features["null_move_pruning"] if null_move_pruning is None else null_move_pruning
+        self.late_move_reductions = search_features["late_move_reductions"] if late_move_reductions is None else late_move_reductions
+        self.null_move_cutoffs = 0
+        self.reduced_searches = 0
+        self.reduced_researches = 0
+        # values of evaluated boards, valid as long as game status (evaluation factors), player and best possible result do not change
+        self.evaluation_cache = EvaluationCache.EvaluationCache(evaluation_cache_size_mb)
+        self.evaluation_cache_status = None
+
+        # root moves are distributed over a pool of worker processes, if more than one worker is set
+        self.workers = workers
+        # lazy smp: helper processes search the same position and share the transposition table with the main search
+        # takes precedence over the distribution of root moves
+        self.smp_helpers = smp_helpers
+        self.transposition_table = TranspositionTable.TranspositionTable(hash_size_mb, shared=smp_helpers > 0)
+        self.search_pool = None
+        self.shared_best_value = None
+        self.stop_search = None
+        self.search_id = 0
+        # plies played since the last search, None if the tables of the search have been cleared (see prepare_search_tables)
+        self.search_plies = None
+
+        # pondering: the reply predicted by the principal variation is searched on a background thread during the turn of the opponent
+        self.ponder = ponder
+        self.last_board = None
+        self.ponder_board = None
+        self.ponder_thread = None
+        self.ponder_move = None
+        self.ponder_limits = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
         
 
     def get_move(self, board):
         super().get_move(board)
 
-       
-        self.game_status = 2
-        evaluation_func = self.evaluate_board
+        move = self.finish_pondering(board)
+        if move is None:
+            move = self.calculate_move(board)
+        if self.ponder:
+            self.last_board = board.copy()
+            self.search_info.update(self.get_ponder_stats())
+        return move
+
+    def calculate_move(self, board, clear_tables=False):
+        '''
+        returns the move of given board: a book move, a move chosen by the tablebase or the result of the search
+        the tables of the last search are reused if possible (see prepare_search_tables), unless clear_tables is set
+        '''
+        self.game_status = self.get_game_status(board)
         if board.fullmove_number <= OPENING_MAX_FULLMOVE_NUM:
-            self.game_status = 1
             move = self.get_opening_move(board, self.opening_book)
             if not move is None:
+                self.principal_variation = [move]
                 return move
+
+        # inside of the tablebase the move is chosen by dtz without search
+        move = self.get_tablebase_move(board)
+        if not move is None:
+            self.principal_variation = [move]
+            return move
         
+        if self.game_status != self.evaluation_funcs_status:
+            self.evaluation_funcs_dict = self.get_evaluation_funcs_by_dif(self.game_status, self.difficulty)
+            self.evaluation_funcs_status = self.game_status
+
+        max_depth = self.get_max_depth_by_game_status(self.game_status) if self.max_depth is None else self.max_depth
+        return self.iterative_deepening(board, max_depth, self.evaluate_board, clear_tables)
+
+    def new_game(self):
+        '''
+        forgets the tables of the last game (transposition table, killer moves, history, evaluation cache and principal variation)
+        '''
+        super().new_game()
+        self.finish_pondering()
+        self.transposition_table.clear()
+        self.move_orderer.clear()
+        self.evaluation_cache.clear()
+        self.evaluation_cache_status = None
+        self.principal_variation = []
+        self.root_ply = 0
+        self.last_board = None
+
+    @staticmethod
+    def get_game_status(board):
+        '''
+        returns the status of the game, which selects the evaluation factors: 1 opening, 2 middlegame, 3 endgame
+        '''
         white_material = EvaluationLib.get_value_by_color(board, chess.WHITE, False)
         black_material = EvaluationLib.get_value_by_color(board, chess.BLACK, False)
         if white_material <= FINISHING_MAX_PIECES and black_material <= FINISHING_MAX_PIECES:
-            self.game_status = 3
-            
-        pieces_counter_white = sum(len(board.pieces(piece_type, chess.WHITE)) for piece_type in chess.PIECE_TYPES)
-        pieces_counter_black = sum(len(board.pieces(piece_type, chess.BLACK)) for piece_type in chess.PIECE_TYPES)
-        
-        if pieces_counter_white + pieces_counter_black <= 5:
-            board.evaluation_func = self.get_dtz_value
-            evaluation_func = self.get_dtz_value
-        
-        self.evaluation_funcs_dict = self.get_evaluation_funcs_by_dif(self.game_status, self.difficulty)
-
-        return self.iterative_deepening(board, self.get_max_depth_by_game_status(self.game_status), evaluation_func)
+            return 3
+        if board.fullmove_number <= OPENING_MAX_FULLMOVE_NUM:
+            return 1
+        return 2
 
     def submit_move(self, move):
         super().submit_move(move)
+        if self.ponder:
+            self.start_pondering(move)
+
+    def start_pondering(self, move):
+        '''
+        starts the search of the board after given own move and the reply predicted by the principal variation on a background thread
+        the ponder search has no time limit, it ends at the maximum depth or when the next move is requested
+        '''
+        if self.last_board is None or len(self.principal_variation) < 2 or self.principal_variation[0] != move:
+            return
+        board = self.last_board
+        board.push(move)
+        predicted_move = self.principal_variation[1]
+        if board.is_game_over() or not board.is_legal(predicted_move):
+            return
+        board.push(predicted_move)
+        if board.is_game_over():
+            return
+
+        if self.workers > 1 or self.smp_helpers > 0:
+            # worker processes are forked by the calling thread, not by the ponder thread
+            self.get_search_pool()
+        self.stop_requested = False
+        self.ponder_board = board
+        self.ponder_move = None
+        # the clock of the game is not touched by the ponder search
+        self.ponder_limits = (self.time_manager, self.time_limit)
+        self.time_manager = TimeManager.TimeManager()
+        self.time_limit = None
+        self.ponder_thread = threading.Thread(target=self.ponder_search, args=(board.copy(),), daemon=True)
+        self.ponder_thread.start()
+
+    def ponder_search(self, board):
+        self.ponder_move = self.calculate_move(board)
+
+    def finish_pondering(self, board=None):
+        '''
+        ends the ponder search: on a ponder hit (given board is the pondered board) it goes on until the time budget of the move is used,
+        otherwise it is stopped immediately, the next search reuses its tables
+        returns the pondered move on a ponder hit, None otherwise
+        '''
+        if self.ponder_thread is None:
+            return None
+        time_manager, time_limit = self.ponder_limits
+        hit = not board is None and board.fen() == self.ponder_board.fen()
+        if hit:
+            self.ponder_hits += 1
+            time_manager.set_move_time(time_limit)
+            time_manager.start()
+            # without time limit the ponder search ends by its depth or node limit
+            remaining_time = time_manager.soft_deadline - TimeManager.get_time()
+            self.ponder_thread.join(None if remaining_time == float('inf') else max(0, remaining_time))
+        elif not board is None:
+            self.ponder_misses += 1
+        self.stop()
+        self.ponder_thread.join()
+        if hit:
+            time_manager.stop()
+        self.stop_requested = False
+        self.time_manager, self.time_limit = time_manager, time_limit
+        self.ponder_thread = None
+        return self.ponder_move if hit else None
+
+    def get_ponder_stats(self):
+        pondered_moves = self.ponder_hits + self.ponder_misses
+        return {
+            "ponder_hits": self.ponder_hits,
+            "ponder_misses": self.ponder_misses,
+            "ponder_hit_rate": self.ponder_hits / pondered_moves if pondered_moves > 0 else 0
+        }
+
+    def set_clock(self, remaining, increment=0, moves_to_go=None):
+        '''
+        sets a game clock (remaining time, increment per move and moves until next time control, in seconds)
+        the clock is kept up to date by the player itself, without clock the time limit per move of the difficulty is used
+        '''
+        self.time_manager.set_game_clock(remaining, increment, moves_to_go)
+
+    def stop(self):
+        '''
+        stops the running search as soon as possible, the best move found so far is returned by it
+        can be called from another thread, the request stays set until stop_requested is reset
+        '''
+        self.stop_requested = True
+        if not self.stop_search is None:
+            self.stop_search.value = True
+
+    def set_hash_size(self, hash_size_mb):
+        '''
+        replaces the transposition table by an empty one of given size
+        '''
+        self.hash_size_mb = hash_size_mb
+        self.transposition_table = TranspositionTable.TranspositionTable(hash_size_mb, shared=self.smp_helpers > 0)
+        self.close()
+
+    def set_smp_helpers(self, smp_helpers):
+        '''
+        sets the number of lazy smp helper processes, the worker processes are restarted with the next search
+        '''
+        self.smp_helpers = smp_helpers
+        self.set_hash_size(self.hash_size_mb)
 
 
     def get_opening_move(self, board, opening_book):
         '''
-        get the current board and return move, as string, for this situation
+        get the current board and return a book move for this situation, chosen randomly by weight
+        returns None if the board is not part of the opening book
         '''
         if not (opening_book is None):
-            try:
-                main_entry = opening_book.find(board)
-                move = main_entry.move()
-                opening_book.close()
-                return move
-            except IndexError:
-                return None
+            return opening_book.weighted_choice(board)
         else:
             return None
 
-    def get_dtz_value(self, board, player):
-        player_factor = 1 if board.turn == player else -1
-        try:
-            return player_factor * self.syzygy.probe_dtz(board)
-        except KeyError:
-            return float('-inf')
+    def get_tablebase_move(self, board):
+        '''
+        returns the move chosen by the dtz values of the tablebase
+        returns None if the board is not covered by the tablebase
+        '''
+        if not self.tablebase.can_probe(board):
+            return None
+        self.tablebase.reset_stats()
+        move = self.tablebase.get_root_move(board)
+        if not move is None:
+            self.search_info = self.tablebase.get_stats()
+        return move
+
+    def get_tablebase_value(self, board, wdl):
+        '''
+        returns the value of a tablebase result from the view of the side to move
+        wins which are reached earlier are preferred, results which are decided by the fifty move rule count as draw
+        '''
+        ply = board.ply() - self.root_ply
+        if wdl > 1:
+            return TABLEBASE_WIN_VALUE - ply
+        if wdl < -1:
+            return -TABLEBASE_WIN_VALUE + ply
+        return 0
 
 
-    def iterative_deepening(self, board, max_depth, evaluation_func):
+    def iterative_deepening(self, board, max_depth, evaluation_func, clear_tables=True):
         depth = 1
-        self.counter=0
+        self.counter = 0
+
+        self.time_manager.set_move_time(self.time_limit)
+        end_time = self.time_manager.start()
+
+        plies = self.prepare_search_tables(board, clear_tables)
+        self.search_plies = plies
+        self.tablebase.reset_stats()
+        self.search_id += 1
+
+        # the search walks a single board with push/pop instead of rebuilding boards from fen strings
+        search_board = board.copy()
+        legal_moves = list(search_board.legal_moves)
+        # the last principal variation is continued, if the game went on as predicted by it
+        previous_variation = self.get_remaining_variation(search_board, plies)
+        if previous_variation and previous_variation[0] in legal_moves:
+            legal_moves.remove(previous_variation[0])
+            legal_moves.insert(0, previous_variation[0])
+        player = self.init_search_state(search_board)
+        best_move = legal_moves[0]
+        best_value = None
+        completed_depth = 0
+        self.principal_variation = [best_move]
+
+        helper_results = self.start_helpers(search_board, max_depth, end_time, evaluation_func) if self.smp_helpers > 0 else []
+        while depth <= max_depth and self.time_manager.can_start_iteration():
+            if self.workers > 1 and self.smp_helpers == 0:
+                value, principal_variation, move_val_dict = self.search_root_moves_parallel(search_board, legal_moves, depth, end_time, evaluation_func)
+            else:
+                value, principal_variation, move_val_dict = self.search_root_aspiration(search_board, legal_moves, player, depth, best_value, end_time, evaluation_func)
+
+            # moves which have been completely searched before the search was stopped are used as well
+            if principal_variation:
+                best_move = principal_variation[0]
+                self.principal_variation = principal_variation
+            if self.search_stopped:
+                break
+            best_value = value
+            completed_depth = depth
+            self.time_manager.finish_iteration()
+            if not self.info_callback is None:
+                self.update_search_info(depth)
+                self.search_info["value"] = value
+                self.search_info["pv"] = [move.uci() for move in self.principal_variation]
+                self.info_callback(self.search_info)
+            if best_value == MAX_BOARD_VALUE:
+                break
+
+            legal_moves.sort(key=lambda move: move_val_dict.get(move, float('-inf')), reverse=True)
+            depth += 1
+
+        helper_nodes, helper_depths = self.stop_helpers(helper_results)
+        self.time_manager.stop()
+        self.update_search_info(completed_depth)
+        self.search_info["value"] = best_value
+        self.search_info["pv"] = [move.uci() for move in self.principal_variation]
+        if self.smp_helpers > 0:
+            self.search_info.update({
+                "helper_nodes": helper_nodes,
+                "helper_depths": helper_depths,
+                "effective_nps": (self.nodes + helper_nodes) / self.search_info["time"] if self.search_info["time"] > 0 else 0
+            })
+        return best_move
+
+    def prepare_search_tables(self, board, clear_tables=False):
+        '''
+        keeps transposition table, killer moves and history of the last search, if given board can continue its game with the same evaluation:
+        old transposition table entries become replaceable, killer moves are moved by the plies played since then and history scores are halved
+        the tables are cleared for a new game (fewer plies than at the last search) and if game status, player or best possible result change,
+        because the stored values depend on the evaluation
+        returns the number of plies played since the last search, None if the tables have been cleared
+        '''
+        player = bool(board.turn)
+        evaluation_status = (self.game_status, player, self.get_best_possible_result(board, player))
+        plies = board.ply() - self.root_ply
+        if clear_tables or plies < 0 or evaluation_status != self.evaluation_cache_status:
+            self.transposition_table.clear()
+            self.move_orderer.clear()
+            return None
+        self.transposition_table.new_search()
+        self.move_orderer.new_search(plies)
+        return plies
 
-        start_time = int(time.time())
-        end_time = start_time + self.time_limit
-        current_time = start_time
+    def get_remaining_variation(self, board, plies):
+        '''
+        returns the rest of the last principal variation, if the moves played since the last search (plies) are its first moves
+        returns empty list otherwise
+        '''
+        if not plies or len(board.move_stack) < plies or self.principal_variation[:plies] != board.move_stack[-plies:]:
+            return []
+        return self.principal_variation[plies:]
 
+    def init_search_state(self, board):
+        '''
+        resets the state of the search (counters, stop flag, incremental evaluator) for a new root position
+        returns the searching player
+        '''
         player = bool(board.turn)
         self.best_possible_result = self.get_best_possible_result(board, player)
+        evaluation_cache_status = (self.game_status, player, self.best_possible_result)
+        if evaluation_cache_status != self.evaluation_cache_status:
+            self.evaluation_cache.clear()
+            self.evaluation_cache_status = evaluation_cache_status
+        self.evaluation_cache.reset_stats()
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.null_move_cutoffs = 0
+        self.reduced_searches = 0
+        self.reduced_researches = 0
+        self.reset_search_stop()
+        self.evaluator.set_board(board)
+        self.root_ply = board.ply()
+        # value of a pawn in the evaluation, scales delta pruning and aspiration windows
+        self.pawn_value = self.get_factors_by_game_status(self.game_status)["board_value"]
+        return player
+
+    def search_root_aspiration(self, board, legal_moves, player, depth, previous_value, end_time, evaluation_func):
+        '''
+        searches the root moves in a window around the value of the previous iteration
+        the window is widened on the failing side and the root is searched again, until the value lies inside of it
+        returns the same as search_root_moves
+        '''
+        alpha, beta = float('-inf'), float('inf')
+        window = ASPIRATION_WINDOW * self.pawn_value
+        aspiration = depth >= ASPIRATION_MIN_DEPTH and not previous_value is None and abs(previous_value) != MAX_BOARD_VALUE
+        if aspiration:
+            alpha, beta = previous_value - window, previous_value + window
+        while True:
+            value, principal_variation, move_val_dict = self.search_root_moves(board, legal_moves, player, depth, alpha, beta, end_time, evaluation_func)
+            if self.search_stopped or alpha < value < beta:
+                return value, principal_variation, move_val_dict
+            if value <= alpha:
+                if alpha == float('-inf'):
+                    return value, principal_variation, move_val_dict
+                alpha = value - window
+            else:
+                if beta == float('inf'):
+                    return value, principal_variation, move_val_dict
+                beta = value + window
+            window *= ASPIRATION_GROWTH
+
+    def search_root_moves(self, board, legal_moves, player, depth, alpha, beta, end_time, evaluation_func):
+        '''
+        searches the root moves one after another by principal variation search in the window (alpha, beta)
+        returns the value of the best move, the principal variation (empty if no move is better than alpha)
+        and a dictionary with value (or bound) per searched move
+        stops as soon as a winning move is found
+        '''
+        best_value = float('-inf')
+        principal_variation = []
+        move_val_dict = {}
+        for move_num, move in enumerate(legal_moves):
+            child_variation = []
+            self.evaluator.push(board, move)
+            value = self.search_child(board, player, alpha, beta, depth - 1, end_time, evaluation_func, child_variation, move_num == 0)
+            self.evaluator.pop(board)
+            if value is False:
+                break
+            move_val_dict[move] = value
+            if value > best_value:
+                best_value = value
+                if value > alpha:
+                    principal_variation = [move] + child_variation
+            if value >= beta or value == MAX_BOARD_VALUE:
+                break
+            alpha = max(alpha, value)
+        return best_value, principal_variation, move_val_dict
+
+    def search_root_moves_parallel(self, board, legal_moves, depth, end_time, evaluation_func):
+        '''
+        distributes the root moves over the worker processes, which share the best value found so far
+        returns the value of the best move, the principal variation (best move and the variation found by its worker)
+        and a dictionary with value per move in order of the given moves (moves which have been stopped get -inf)
+        if the search has been stopped before the first move (the best move of the last iteration) has been finished,
+        the principal variation is empty like in search_root_moves, the best moves of the finished moves are not comparable with it
+        '''
+        search_pool = self.get_search_pool()
+        self.shared_best_value.value = float('-inf')
+        # the flag is left set by stop and by the helpers of the last search, it is only kept if this search has to stop
+        self.stop_search.value = self.stop_requested
+        # the workers know the limits of the search only by their tasks, their copy of the player is made once when the pool is created
+        max_nodes = None if self.max_nodes is None else max(0, self.max_nodes - self.nodes)
+        tasks = [(board, move, depth, end_time, self.game_status, evaluation_func.__name__, self.search_id, self.search_plies, max_nodes) for move in legal_moves]
+        results = {}
+        variations = {}
+        for move, value, variation, counters, stopped in search_pool.imap_unordered(search_root_move, tasks):
+            results[move] = value
+            variations[move] = variation
+            self.add_search_counters(counters)
+            self.search_stopped = self.search_stopped or stopped
+        self.search_stopped = self.search_stopped or self.stop_requested
+        move_val_dict = {move: results[move] for move in legal_moves}
+        if self.search_stopped and move_val_dict[legal_moves[0]] == float('-inf'):
+            return float('-inf'), [], move_val_dict
+        best_move = max(move_val_dict, key=move_val_dict.get)
+        return move_val_dict[best_move], [best_move] + variations[best_move], move_val_dict
+
+    def search_root_move(self, board, move, depth, end_time, game_status, evaluation_func_name, search_id, plies, max_nodes):
+        '''
+        searches a single root move inside of a worker process with at most max_nodes nodes (None: no node limit)
+        the tables of the worker are kept or cleared like the tables of the main process (plies is None if they have been cleared)
+        returns the move, its value, the variation after it, the counters of the search (see get_search_counters) and whether the search has been stopped
+        '''
+        if search_id != self.search_id:
+            self.search_id = search_id
+            if plies is None:
+                self.transposition_table.clear()
+                self.move_orderer.clear()
+            else:
+                self.transposition_table.new_search()
+                self.move_orderer.new_search(plies)
+            self.game_status = game_status
+            self.evaluation_funcs_dict = self.get_evaluation_funcs_by_dif(game_status, self.difficulty)
+        self.max_nodes = max_nodes
+        # the counters of every root move are added up by the main process
+        self.transposition_table.reset_stats()
+        self.move_orderer.reset_stats()
+        self.tablebase.reset_stats()
+
+        player = self.init_search_state(board)
+        alpha = self.shared_best_value.value - ROOT_SPLIT_MARGIN
+        variation = []
+        self.evaluator.push(board, move)
+        value = self.negamax(board, player, float('-inf'), -alpha, depth - 1, end_time, getattr(self, evaluation_func_name), variation)
+        self.evaluator.pop(board)
+
+        if value is False:
+            value = float('-inf')
+        else:
+            value = -value
+        if value > self.shared_best_value.value:
+            with self.shared_best_value.get_lock():
+                if value > self.shared_best_value.value:
+                    self.shared_best_value.value = value
+        return move, value, variation, self.get_search_counters(), self.search_stopped
+
+    def start_helpers(self, board, max_depth, end_time, evaluation_func):
+        '''
+        starts the lazy smp helpers on the worker processes
+        returns list of async results of the helpers
+        '''
+        search_pool = self.get_search_pool()
+        self.stop_search.value = self.stop_requested
+        return [search_pool.apply_async(helper_search, ((board, max_depth, end_time, self.game_status, evaluation_func.__name__, helper_num, self.transposition_table.age, self.max_nodes),))
+            for helper_num in range(self.smp_helpers)]
+
+    def stop_helpers(self, helper_results):
+        '''
+        stops the lazy smp helpers
+        returns the overall number of nodes visited by the helpers and the depth every helper has completed
+        '''
+        if not helper_results:
+            return 0, []
+        self.stop_search.value = True
+        results = [helper_result.get() for helper_result in helper_results]
+        return sum(nodes for nodes, _ in results), [depth for _, depth in results]
+
+    def helper_search(self, board, max_depth, end_time, game_status, evaluation_func_name, helper_num, tt_age, max_nodes):
+        '''
+        runs the iterative deepening of a lazy smp helper inside of a worker process with at most max_nodes nodes (None: no node limit)
+        helpers differ from the main search by their start depth and the order of the root moves,
+        their results reach the main search only through the shared transposition table
+        returns the number of visited nodes and the deepest completed depth
+        '''
+        self.game_status = game_status
+        self.evaluation_funcs_dict = self.get_evaluation_funcs_by_dif(game_status, self.difficulty)
+        self.max_nodes = max_nodes
+        # entries of the helpers belong to the same search as the entries of the main search
+        self.transposition_table.age = tt_age
+        self.transposition_table.reset_stats()
+        self.move_orderer.clear()
+        evaluation_func = getattr(self, evaluation_func_name)
 
+        player = self.init_search_state(board)
         legal_moves = list(board.legal_moves)
-        while current_time < end_time and depth <= max_depth:
-            move_val_dict = {}
-
-            best_value = float('-inf')
-            best_move = legal_moves[0]
-
-            for move in legal_moves:
-                tmp_board = chess.Board(str(board.fen()))
-                tmp_board.push(move)
-                value = self.min_value(str(tmp_board.fen()), player, float('-inf'), float('inf'), depth - 1, end_time, evaluation_func)
-                if value is False:
-                    value = float('-inf')
-                move_val_dict[move] = value
-                if value == MAX_BOARD_VALUE:
-                    return move
-                if value > best_value:
-                    best_value = value
-                    best_move = move
-            
-            legal_moves.sort(key=move_val_dict.get, reverse=True)
-            depth *= 2
-            current_time = int(time.time())
+        random.Random(helper_num).shuffle(legal_moves)
+        depth = 1 + helper_num % 2
+        completed_depth = 0
+        while depth <= max_depth and not self.is_search_stopped(end_time):
+            _, _, move_val_dict = self.search_root_moves(board, legal_moves, player, depth, float('-inf'), float('inf'), end_time, evaluation_func)
+            if self.search_stopped:
+                break
+            completed_depth = depth
+            legal_moves.sort(key=lambda move: move_val_dict.get(move, float('-inf')), reverse=True)
+            depth += 1
+        return self.nodes, completed_depth
 
-        return best_move
+    def is_search_stopped(self, time_limit):
+        '''
+        returns True if the time limit or the node limit is reached or the search has been stopped by the main process or another thread
+        the clock is only read every TIME_CHECK_NODES nodes, once stopped the search stays stopped
+        '''
+        if self.search_stopped:
+            return True
+        if self.stop_requested:
+            self.search_stopped = True
+        elif self.nodes >= self.next_time_check:
+            self.next_time_check = self.nodes + TIME_CHECK_NODES if self.max_nodes is None else min(self.nodes + TIME_CHECK_NODES, self.max_nodes)
+            self.search_stopped = TimeManager.get_time() >= time_limit or (not self.stop_search is None and self.stop_search.value) \
+                or (not self.max_nodes is None and self.nodes >= self.max_nodes)
+        return self.search_stopped
 
-    @lru_cache(maxsize=256)
-    def min_value(self, board_fen, player, alpha, beta, depth, time_limit, evaluation_func):
-        board = chess.Board(board_fen)
-        v = float('inf')
+    def reset_search_stop(self):
+        self.search_stopped = False
+        self.next_time_check = 0
 
-        if board.is_game_over() or depth == 0:
-            return evaluation_func(board, player)
-        if int(time.time()) >= time_limit:
-            return False
+    def get_search_pool(self):
+        '''
+        returns the pool of worker processes, it is created on first use and kept for all following moves
+        '''
+        if self.search_pool is None:
+            self.shared_best_value = multiprocessing.Value('d', float('-inf'))
+            self.stop_search = multiprocessing.RawValue(ctypes.c_bool, False)
+            num_processes = self.smp_helpers if self.smp_helpers > 0 else self.workers
+            self.search_pool = multiprocessing.Pool(num_processes, initializer=init_search_worker, initargs=(self, self.shared_best_value, self.stop_search))
+        return self.search_pool
 
-        for move in board.legal_moves:
-            tmp_board = chess.Board(board_fen)
-            tmp_board.push(move)
-            
-            deeper_val = self.max_value(str(tmp_board.fen()), player, alpha, beta, depth -1, time_limit, evaluation_func)
-            if deeper_val is False:
-                return False            
-            v = min(v, deeper_val)  
-            
-            if v <= alpha:
-                return v
-            beta = min(beta, v)
-        return v
+    def close(self):
+        '''
+        stops pondering and terminates the worker processes of this player
+        '''
+        self.finish_pondering()
+        if not self.search_pool is None:
+            self.search_pool.terminate()
+            self.search_pool.join()
+            self.search_pool = None
 
-    @lru_cache(maxsize=256)
-    def max_value(self, board_fen, player, alpha, beta, depth, time_limit, evaluation_func):
-        board = chess.Board(board_fen)
-        v = float('-inf')
+    def __getstate__(self):
+        '''
+        worker processes get a copy of the player without opening book, process pool and info callback
+        the transposition table is only handed over if it is placed in shared memory
+        '''
+        state = self.__dict__.copy()
+        for attr in ("opening_book", "search_pool", "shared_best_value", "stop_search", "info_callback", "ponder_thread"):
+            state[attr] = None
+        if not self.transposition_table.shared:
+            state["transposition_table"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.transposition_table is None:
+            self.transposition_table = TranspositionTable.TranspositionTable(self.hash_size_mb)
 
-        if board.is_game_over() or depth == 0:
-            return evaluation_func(board, player)
-        if int(time.time()) >= time_limit:
+    def update_search_info(self, depth):
+        '''
+        stores statistics of the last search, e.g. the number of visited nodes per second
+        '''
+        search_time = self.time_manager.get_elapsed_time()
+        self.search_info = {
+            "depth": depth,
+            "main_nodes": self.nodes - self.quiescence_nodes,
+            "time": search_time,
+            "nps": self.nodes / search_time if search_time > 0 else 0
+        }
+        self.search_info.update(self.get_search_counters())
+
+    def get_search_counters(self):
+        '''
+        returns the counters of the current search: nodes, pruning and statistics of transposition table, move ordering, evaluation cache and tablebase
+        '''
+        counters = {
+            "nodes": self.nodes,
+            "quiescence_nodes": self.quiescence_nodes,
+            "null_move_cutoffs": self.null_move_cutoffs,
+            "reduced_searches": self.reduced_searches,
+            "reduced_researches": self.reduced_researches
+        }
+        for table in (self.transposition_table, self.move_orderer, self.evaluation_cache, self.tablebase):
+            counters.update(table.get_stats())
+        return counters
+
+    def add_search_counters(self, counters):
+        '''
+        adds the counters of the search of a worker process (given by its get_search_counters)
+        '''
+        self.nodes += counters["nodes"]
+        self.quiescence_nodes += counters["quiescence_nodes"]
+        self.null_move_cutoffs += counters["null_move_cutoffs"]
+        self.reduced_searches += counters["reduced_searches"]
+        self.reduced_researches += counters["reduced_researches"]
+        for table in (self.transposition_table, self.move_orderer, self.evaluation_cache, self.tablebase):
+            table.add_stats(counters)
+
+    def negamax(self, board, player, alpha, beta, depth, time_limit, evaluation_func, variation):
+        '''
+        principal variation search from the view of the side to move, the value of a node is the negated value of its best child
+        fills variation with the principal variation of the node
+        returns False if the search has been stopped
+        '''
+        self.nodes += 1
+
+        if board.is_game_over():
+            return self.get_side_value(board, player, evaluation_func)
+        if self.tablebase.can_probe(board):
+            wdl = self.tablebase.probe_wdl(board, self.evaluator.get_zobrist_key(board))
+            if not wdl is None:
+                return self.get_tablebase_value(board, wdl)
+        if depth == 0:
+            return self.get_leaf_value(board, player, alpha, beta, evaluation_func)
+        if self.is_search_stopped(time_limit):
             return False
 
-        for move in board.legal_moves:
-            tmp_board = chess.Board(board_fen)
-            tmp_board.push(move)
-            
-            deeper_val = self.min_value(str(tmp_board.fen()), player, alpha, beta, depth -1, time_limit, evaluation_func)
+        key = self.evaluator.get_zobrist_key(board)
+        alpha, beta, tt_value, tt_move = self.probe_transposition_table(key, alpha, beta, depth)
+        if not tt_value is None:
+            if not tt_move is None:
+                variation.append(tt_move)
+            return tt_value
+        alpha_orig, beta_orig = alpha, beta
+
+        in_check = board.is_check()
+        if self.null_move_pruning and not in_check and self.is_null_move_allowed(board, alpha, beta, depth):
+            self.evaluator.push(board, chess.Move.null())
+            null_val = self.negamax(board, player, -beta, -beta + NULL_WINDOW, depth - 1 - NULL_MOVE_REDUCTION, time_limit, evaluation_func, [])
+            self.evaluator.pop(board)
+            if null_val is False:
+                return False
+            if -null_val >= beta:
+                self.null_move_cutoffs += 1
+                # a mate found after passing is not proven for the real moves
+                return beta if -null_val == MAX_BOARD_VALUE else -null_val
+
+        v = float('-inf')
+        best_move = None
+        ply = board.ply() - self.root_ply
+        for move_num, move in enumerate(self.move_orderer.order_moves(board, ply, tt_move)):
+            reduction = 0
+            if self.late_move_reductions and depth >= LMR_MIN_DEPTH and move_num >= LMR_MIN_MOVE_NUM and not in_check \
+                    and not board.is_capture(move) and not move.promotion and not board.gives_check(move):
+                reduction = LMR_REDUCTION
+            child_variation = []
+            self.evaluator.push(board, move)
+            deeper_val = self.search_child(board, player, alpha, beta, depth - 1, time_limit, evaluation_func, child_variation, move_num == 0, reduction)
+            self.evaluator.pop(board)
             if deeper_val is False:
                 return False
-            v = max(v, deeper_val)
-            
+            if deeper_val > v or best_move is None:
+                v = deeper_val
+                best_move = move
+                if v > alpha:
+                    variation[:] = [move] + child_variation
+
             if v >= beta:
-                return v
+                self.move_orderer.record_cutoff(board, move, ply, depth, move_num)
+                break
             alpha = max(alpha, v)
+
+        self.store_transposition_table(key, alpha_orig, beta_orig, depth, v, best_move)
         return v
 
+    def search_child(self, board, player, alpha, beta, depth, time_limit, evaluation_func, variation, full_window, reduction=0):
+        '''
+        searches the node after a move and returns its value from the view of the side which made the move
+        if full_window is not set, the node is searched with a null window first, which only proves that the move is not better than alpha,
+        it is searched again with the full window only if it turns out to be better
+        if a reduction is given, the null window search is done with reduced depth first
+        returns False if the search has been stopped
+        '''
+        if reduction > 0 and alpha > float('-inf'):
+            self.reduced_searches += 1
+            value = self.negamax(board, player, -alpha - NULL_WINDOW, -alpha, depth - reduction, time_limit, evaluation_func, variation)
+            if value is False:
+                return False
+            if -value <= alpha:
+                return -value
+            self.reduced_researches += 1
+            del variation[:]
+        if not full_window and alpha > float('-inf'):
+            value = self.negamax(board, player, -alpha - NULL_WINDOW, -alpha, depth, time_limit, evaluation_func, variation)
+            if value is False:
+                return False
+            if not alpha < -value < beta:
+                return -value
+            del variation[:]
+        value = self.negamax(board, player, -beta, -alpha, depth, time_limit, evaluation_func, variation)
+        return False if value is False else -value
+
+    def is_null_move_allowed(self, board, alpha, beta, depth):
+        '''
+        returns True if the side to move may pass in a null move search:
+        not at nodes of the principal variation, not twice in a row, not too close to the leaves
+        and not with low material (as defined for the end of the game), where zugzwang makes passing a real advantage
+        '''
+        if depth < NULL_MOVE_MIN_DEPTH or beta - alpha > 2 * NULL_WINDOW or beta == MAX_BOARD_VALUE:
+            return False
+        if board.move_stack and not board.peek():
+            return False
+        return self.evaluator.get_value_by_color(board, board.turn, False) > FINISHING_MAX_PIECES
+
+    def get_side_value(self, board, player, evaluation_func):
+        '''
+        returns the value of given board from the view of the side to move, evaluation functions rate it from the view of player
+        '''
+        value = evaluation_func(board, player)
+        return value if board.turn == player else -value
+
+    def get_leaf_value(self, board, player, alpha, beta, evaluation_func):
+        '''
+        returns the value of a leaf of the main search, by quiescence search if it is enabled
+        '''
+        if not self.quiescence:
+            return self.get_side_value(board, player, evaluation_func)
+        self.quiescence_budget = QUIESCENCE_MAX_NODES
+        return self.quiescence_search(board, player, alpha, beta, 0, evaluation_func)
+
+    def quiescence_search(self, board, player, alpha, beta, qdepth, evaluation_func):
+        '''
+        searches captures, promotions and check evasions until the position is quiet,
+        so leaves are not evaluated in the middle of an exchange
+        the side to move can stand pat (keep the static value) instead of capturing, except if it is in check
+        '''
+        if board.is_game_over():
+            return self.get_side_value(board, player, evaluation_func)
+        exhausted = qdepth >= QUIESCENCE_MAX_DEPTH or self.quiescence_budget <= 0
+
+        if board.is_check():
+            if exhausted:
+                return self.get_side_value(board, player, evaluation_func)
+            stand_pat = None
+            v = float('-inf')
+            moves = self.move_orderer.order_moves(board, MoveOrdering.MAX_PLY)
+        else:
+            stand_pat = self.get_side_value(board, player, evaluation_func)
+            if exhausted or stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            v = stand_pat
+            moves = self.move_orderer.order_captures(board)
+
+        for move in moves:
+            # delta pruning: skip captures which cannot raise the value to alpha, even with a margin
+            if not stand_pat is None and stand_pat + (MoveOrdering.MoveOrderer.get_material_gain(board, move) + DELTA_MARGIN) * self.pawn_value <= alpha:
+                continue
+
+            self.nodes += 1
+            self.quiescence_nodes += 1
+            self.quiescence_budget -= 1
+            self.evaluator.push(board, move)
+            value = -self.quiescence_search(board, player, -beta, -alpha, qdepth + 1, evaluation_func)
+            self.evaluator.pop(board)
+
+            if value > v:
+                v = value
+                if v >= beta:
+                    return v
+                alpha = max(alpha, v)
+            if self.quiescence_budget <= 0:
+                break
+        return v
+
+    def probe_transposition_table(self, key, alpha, beta, depth):
+        '''
+        looks up the transposition table and narrows the search window by a stored bound
+        returns the (narrowed) window, the value if it decides the node (otherwise None) and the stored best move
+        '''
+        entry = self.transposition_table.probe(key)
+        if entry is None:
+            return alpha, beta, None, None
+        tt_depth, tt_flag, tt_value, tt_move = entry
+        if tt_depth >= depth:
+            if tt_flag == TranspositionTable.EXACT:
+                return alpha, beta, tt_value, tt_move
+            if tt_flag == TranspositionTable.LOWER_BOUND:
+                alpha = max(alpha, tt_value)
+            elif tt_flag == TranspositionTable.UPPER_BOUND:
+                beta = min(beta, tt_value)
+            if alpha >= beta:
+                return alpha, beta, tt_value, tt_move
+        return alpha, beta, None, tt_move
+
+    def store_transposition_table(self, key, alpha, beta, depth, value, best_move):
+        '''
+        stores the value of a searched node with its bound type in relation to the original search window
+        '''
+        if value <= alpha:
+            flag = TranspositionTable.UPPER_BOUND
+        elif value >= beta:
+            flag = TranspositionTable.LOWER_BOUND
+        else:
+            flag = TranspositionTable.EXACT
+        self.transposition_table.store(key, depth, flag, value, best_move)
+
     def evaluate_board(self, board, player):
-        player_color = chess.WHITE if player else chess.BLACK
+        '''
+        returns the value of given board from the view of player, boards which have been evaluated before are looked up in the evaluation cache
+        '''
         self.counter+=1
+        key = self.evaluator.get_zobrist_key(board)
+        value = self.evaluation_cache.probe(key)
+        if value is None:
+            value = self.calculate_board_value(board, player)
+            self.evaluation_cache.store(key, value)
+        return value
+
+    def calculate_board_value(self, board, player):
+        player_color = chess.WHITE if player else chess.BLACK
 
         if board.is_game_over():
             result = Tools.get_board_result(board)
@@ -276,10 +1036,11 @@ class Player(PlayerInterface):
 
     def get_evaluation_funcs_by_dif(self, game_status, difficulty):
         factor_dict = self.get_factors_by_game_status(game_status)
+        # material and piece position values are taken from the incremental evaluator, which is kept up to date by the search
         funcs_by_deg_of_dif = {
-            1: {EvaluationLib.get_board_value: factor_dict.get("board_value")},
-            2: {EvaluationLib.get_board_value: factor_dict.get("board_value"), EvaluationLib.get_attacked_pieces_value: factor_dict.get("attacked_pieces"), EvaluationLib.get_board_value_by_history: factor_dict.get("history")},
-            3: {EvaluationLib.get_board_value: factor_dict.get("board_value"), EvaluationLib.get_attacked_pieces_value: factor_dict.get("attacked_pieces"), EvaluationLib.get_board_positions_value: factor_dict.get("board_position"), EvaluationLib.get_opp_board_positions_value: factor_dict.get("opp_board_position"), EvaluationLib.calculate_king_zone_safety: factor_dict.get("king_safety"), EvaluationLib.calculate_opp_king_zone_safety: factor_dict.get("opp_king_safety"), EvaluationLib.calculate_mobility_value: factor_dict.get("mobility")}
+            1: {self.evaluator.get_board_value: factor_dict.get("board_value")},
+            2: {self.evaluator.get_board_value: factor_dict.get("board_value"), EvaluationLib.get_attacked_pieces_value: factor_dict.get("attacked_pieces"), EvaluationLib.get_board_value_by_history: factor_dict.get("history")},
+            3: {self.evaluator.get_board_value: factor_dict.get("board_value"), EvaluationLib.get_attacked_pieces_value: factor_dict.get("attacked_pieces"), self.evaluator.get_board_positions_value: factor_dict.get("board_position"), self.evaluator.get_opp_board_positions_value: factor_dict.get("opp_board_position"), EvaluationLib.calculate_king_zone_safety: factor_dict.get("king_safety"), EvaluationLib.calculate_opp_king_zone_safety: factor_dict.get("opp_king_safety"), EvaluationLib.calculate_mobility_value: factor_dict.get("mobility")}
         }
         return funcs_by_deg_of_dif.get(difficulty)
 
@@ -292,6 +1053,15 @@ class Player(PlayerInterface):
         }
         return time_limit.get(difficulty)
 
+    @staticmethod
+    def get_search_features_by_dif(difficulty):
+        search_features = {
+            1: {"null_move_pruning": False, "late_move_reductions": False},
+            2: {"null_move_pruning": True, "late_move_reductions": True},
+            3: {"null_move_pruning": True, "late_move_reductions": True}
+        }
+        return search_features.get(difficulty)
+
     def get_factors_by_game_status(self, game_status):
         return {
             1: {
@@ -335,22 +1105,44 @@ class Player(PlayerInterface):
 
     def import_opening_book(self, book_location):
         '''
-        load an opening book
+        load an opening book, it is shared by all players of this process
         raise an error if system cannot find the opening-book file
         '''
-        if os.path.isfile(book_location):
-            return chess.polyglot.open_reader(book_location)
-        else:
-            raise FileNotFoundError(
-                errno.ENOENT, os.strerror(errno.ENOENT), book_location)
+        return OpeningBook.get_opening_book(book_location)
 
     def import_syzygy(self, syzygy_location):
         '''
-        load a syzygy tablebase
-        raise an error if system cannot find the file
+        returns the prober of a syzygy tablebase, the tables are opened on the first endgame probe
+        raise an error if system cannot find the directory
         '''
         if os.path.isdir(syzygy_location):
-            return chess.syzygy.open_tablebase(syzygy_location)
+            return Tablebase.TablebaseProber(syzygy_location)
         else:
             raise FileNotFoundError(
                 errno.ENOENT, os.strerror(errno.ENOENT), SYZYGY_LOC)
+
+
+worker_player = None
+
+
+def init_search_worker(player, shared_best_value, stop_search):
+    '''
+    creates the player of a worker process, which searches the root moves given by search_root_move
+    or runs a lazy smp helper given by helper_search
+    '''
+    global worker_player
+    worker_player = Player.__new__(Player)
+    worker_player.__setstate__(player.__getstate__())
+    worker_player.workers = 1
+    worker_player.smp_helpers = 0
+    worker_player.shared_best_value = shared_best_value
+    worker_player.stop_search = stop_search
+    worker_player.stop_requested = False
+
+
+def search_root_move(task):
+    return worker_player.search_root_move(*task)
+
+
+def helper_search(task):
+    return worker_player.helper_search(*task)
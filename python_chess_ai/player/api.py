@@ -9,13 +9,61 @@
 
 from player.interface import PlayerInterface
 
+import json
+import urllib.request
+import urllib.error
+import chess
+
+SERVER_URL = "http://127.0.0.1:8080"
+# longest time per move accepted by the server
+MAX_MOVE_TIME = 60
+# additional seconds the server may need to answer, apart from the search itself
+REQUEST_TIMEOUT_MARGIN = 30
+
 
 class Player(PlayerInterface):
-    def __init__(self, num, name, ui_status, difficulty=None):
+    '''
+    client of the move server (see server.py): moves are requested by fen over http
+    '''
+
+    def __init__(self, num, name, ui_status, difficulty=None, server_url=SERVER_URL, time_limit=None):
         super().__init__(num, name, ui_status, difficulty)
+        self.difficulty = difficulty
+        self.server_url = server_url
+        # time per move in seconds, the server uses the time limit of the difficulty if it is not set
+        self.time_limit = time_limit
+        self.search_info = {}
 
     def get_move(self, board):
         super().get_move(board)
+        request = {"fen": board.fen()}
+        if not self.time_limit is None:
+            request["time"] = self.time_limit
+        if self.difficulty in range(1, 4):
+            request["difficulty"] = self.difficulty
+        self.search_info = self.send_request("/move", request)
+        return chess.Move.from_uci(self.search_info["move"])
 
     def submit_move(self, move):
-        super().submit_move(move)
\ No newline at end of file
+        super().submit_move(move)
+
+    def get_server_stats(self):
+        '''
+        returns number of requests and latencies (p50/p99) of the server
+        '''
+        return self.send_request("/stats")
+
+    def send_request(self, path, request=None):
+        '''
+        sends a request to the server (POST with json body if request is given, GET otherwise) and returns its decoded response
+        raise an error with the message of the server if the request is not successful
+        '''
+        data = None if request is None else json.dumps(request).encode()
+        http_request = urllib.request.Request(self.server_url + path, data=data, headers={"Content-Type": "application/json"})
+        timeout = (self.time_limit or MAX_MOVE_TIME) + REQUEST_TIMEOUT_MARGIN
+        try:
+            with urllib.request.urlopen(http_request, timeout=timeout) as response:
+                return json.loads(response.read().decode())
+        except urllib.error.HTTPError as error:
+            message = json.loads(error.read().decode()).get("error", error.reason)
+            raise RuntimeError("move server answered {}: {}".format(error.code, message))
@@ -35,5 +35,11 @@ class PlayerInterface(ABC):
     def submit_move(self, move):
         ...
 
+    def new_game(self):
+        '''
+        called before the first move of every game
+        '''
+        pass
+
     def print_board(self, player_name, board):
         self.ui.print_board(player_name, board)
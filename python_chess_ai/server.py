@@ -0,0 +1,299 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides a headless HTTP/JSON server which calculates moves of the ai on a warm pool of worker processes
+#
+# usage: POST /move with {"fen": ..., "time": seconds, "difficulty": 1-3}, answered with {"move": ..., "value": ..., "mate": ..., "pv": [...], ...}
+#        GET /stats for the number of requests and the latencies (p50/p99) of the last requests
+#
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import multiprocessing
+import time
+import chess
+import misc.tablebase as Tablebase
+from player import ai
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_DIFFICULTY = 1
+# requests which wait for a free worker, further requests are rejected
+MAX_QUEUED_REQUESTS = 32
+MAX_MOVE_TIME = 60
+MAX_BODY_BYTES = 64 * 1024
+# number of last requests whose latencies are used for the percentiles
+LATENCY_WINDOW = 1000
+# value of a mate in responses, json has no infinite numbers
+MATE_VALUE = 1000000
+
+HTTP_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+worker_players = {}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def get_worker_player(difficulty):
+    '''
+    returns the player of given difficulty of this worker process, it is created on first use and kept for all further requests
+    '''
+    if difficulty not in worker_players:
+        worker_players[difficulty] = ai.Player(1, "Server", 0, difficulty)
+    return worker_players[difficulty]
+
+
+def init_worker(difficulty):
+    '''
+    creates the player of the default difficulty and opens the tablebase before the first request
+    '''
+    get_worker_player(difficulty)
+    Tablebase.get_tablebase()
+
+
+def warm_up():
+    '''
+    runs on every worker process of the pool once, so all of them are started before the first request
+    '''
+    time.sleep(0.1)
+
+
+def get_response_value(value):
+    '''
+    returns the value of a search for the response and whether it is a mate, mates are sent as +-MATE_VALUE
+    '''
+    if value in (ai.MAX_BOARD_VALUE, -ai.MAX_BOARD_VALUE):
+        return (MATE_VALUE if value > 0 else -MATE_VALUE), True
+    return value, False
+
+
+def search_move(fen, time_limit, difficulty):
+    '''
+    calculates the move of given board within given time limit (None: time limit of the difficulty)
+    returns dictionary with move, value (mate flag is set for mates) and principal variation
+    '''
+    board = chess.Board(fen)
+    player = get_worker_player(difficulty)
+    player.time_limit = player.get_timeout_by_dif(difficulty) if time_limit is None else time_limit
+    player.search_info = {}
+    start = time.perf_counter()
+    move = player.get_move(board)
+    info = player.search_info
+    if "pv" in info:
+        source = "search"
+    elif "tb_dtz_probes" in info:
+        source = "tablebase"
+    else:
+        source = "book"
+    value, mate = get_response_value(info.get("value"))
+    return {
+        "move": move.uci(),
+        "value": value,
+        "mate": mate,
+        "pv": info.get("pv", [move.uci()]),
+        "depth": info.get("depth", 0),
+        "nodes": info.get("nodes", 0),
+        "source": source,
+        "time": time.perf_counter() - start
+    }
+
+
+def is_number(value):
+    '''
+    returns True if given value of a json request is a number (booleans are no numbers, although they are ints in python)
+    '''
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def get_percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * percentile / 100))]
+
+
+class MoveServer:
+    '''
+    answers move requests on a pool of worker processes, each of them keeps its players (with opening book and tablebase) over all requests
+    at most workers requests are searched at once, up to max_queued further requests wait for a free worker, all others are rejected
+    '''
+
+    def __init__(self, workers, difficulty=SERVER_DIFFICULTY, max_queued=MAX_QUEUED_REQUESTS):
+        self.workers = workers
+        self.difficulty = difficulty
+        self.max_queued = max_queued
+        self.executor = None
+        self.search_slots = None
+        self.pending_requests = 0
+        self.requests = 0
+        self.rejected_requests = 0
+        self.failed_requests = 0
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    async def start(self, host=SERVER_HOST, port=SERVER_PORT):
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(self.difficulty,))
+        loop = asyncio.get_event_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, warm_up) for _ in range(self.workers)))
+        self.search_slots = asyncio.Semaphore(self.workers)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    def close(self):
+        if not self.executor is None:
+            self.executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            status, response = await self.handle_request(reader)
+            body = json.dumps(response, allow_nan=False).encode()
+        except RequestError as error:
+            status, response = error.status, {"error": str(error)}
+            body = json.dumps(response).encode()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        except Exception as error:
+            status, response = 500, {"error": "internal error: {}".format(error)}
+            body = json.dumps(response).encode()
+        header = "HTTP/1.1 {} {}\r\nContent-Type: application/json\r\nContent-Length: {}\r\nConnection: close\r\n\r\n".format(
+            status, HTTP_REASONS.get(status, ""), len(body))
+        writer.write(header.encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def handle_request(self, reader):
+        '''
+        reads a http request and returns status code and response dictionary
+        '''
+        request_line = (await reader.readline()).decode("latin-1").split()
+        if len(request_line) < 2:
+            raise RequestError(400, "invalid request line")
+        method, path = request_line[0], request_line[1]
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if path == "/stats":
+            return 200, self.get_stats()
+        if path != "/move":
+            raise RequestError(404, "unknown path")
+        if method != "POST":
+            raise RequestError(405, "moves are requested by POST")
+        content_length = headers.get("content-length", "0")
+        if not content_length.isdigit():
+            raise RequestError(400, "invalid content length")
+        content_length = int(content_length)
+        if content_length > MAX_BODY_BYTES:
+            raise RequestError(413, "request too large")
+        try:
+            request = json.loads((await reader.readexactly(content_length)).decode())
+        except ValueError:
+            raise RequestError(400, "invalid json")
+        return 200, await self.get_move(request)
+
+    def parse_move_request(self, request):
+        '''
+        returns fen, time limit and difficulty of a move request
+        raise an error if the request is invalid
+        '''
+        if not isinstance(request, dict) or not "fen" in request:
+            raise RequestError(400, "fen is missing")
+        if not isinstance(request["fen"], str):
+            raise RequestError(400, "fen has to be a string")
+        try:
+            board = chess.Board(request["fen"])
+        except ValueError:
+            raise RequestError(400, "invalid fen")
+        if board.is_game_over():
+            raise RequestError(400, "game is over")
+        time_limit = request.get("time")
+        if not time_limit is None and (not is_number(time_limit) or not 0 < time_limit <= MAX_MOVE_TIME):
+            raise RequestError(400, "time has to be between 0 and {} seconds".format(MAX_MOVE_TIME))
+        difficulty = request.get("difficulty", self.difficulty)
+        if not is_number(difficulty) or not isinstance(difficulty, int) or difficulty not in range(1, 4):
+            raise RequestError(400, "difficulty has to be 1, 2 or 3")
+        return board.fen(), time_limit, difficulty
+
+    async def get_move(self, request):
+        fen, time_limit, difficulty = self.parse_move_request(request)
+        if self.pending_requests >= self.workers + self.max_queued:
+            self.rejected_requests += 1
+            raise RequestError(503, "too many requests")
+
+        start = time.perf_counter()
+        self.pending_requests += 1
+        try:
+            async with self.search_slots:
+                response = await asyncio.get_event_loop().run_in_executor(self.executor, search_move, fen, time_limit, difficulty)
+        except Exception as error:
+            self.failed_requests += 1
+            raise RequestError(500, "search failed: {}".format(error))
+        finally:
+            self.pending_requests -= 1
+        self.requests += 1
+        self.latencies.append(time.perf_counter() - start)
+        return response
+
+    def get_stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "rejected_requests": self.rejected_requests,
+            "failed_requests": self.failed_requests,
+            "pending_requests": self.pending_requests,
+            "workers": self.workers,
+            "p50": get_percentile(latencies, 50),
+            "p99": get_percentile(latencies, 99)
+        }
+
+
+async def serve(args):
+    move_server = MoveServer(args.workers, args.difficulty, args.queue)
+    server = await move_server.start(args.host, args.port)
+    print("Serving moves on http://{}:{} with {} workers".format(args.host, args.port, args.workers))
+    try:
+        await server.serve_forever()
+    finally:
+        server.close()
+        move_server.close()
+
+
+def initialize_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default=SERVER_HOST, help="address the server listens on")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="port the server listens on")
+    parser.add_argument("-w", "--workers", type=int, default=multiprocessing.cpu_count(), help="number of worker processes")
+    parser.add_argument("-d", "--difficulty", type=int, choices=range(1, 4), default=SERVER_DIFFICULTY, help="difficulty of requests without difficulty")
+    parser.add_argument("-q", "--queue", type=int, default=MAX_QUEUED_REQUESTS, help="number of requests waiting for a free worker, further requests are rejected")
+    return parser
+
+
+if __name__ == '__main__':
+    parser = initialize_parser()
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        print("\nServer stopped.")
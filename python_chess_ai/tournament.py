@@ -0,0 +1,207 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file plays tournaments between two players without any interactive input, the games are distributed over a pool of worker processes
+#
+import argparse
+import multiprocessing
+import random
+import time
+import chess
+import misc.tools as Tools
+import misc.history_store as HistoryStore
+from player import ai, dummy
+
+TOURNAMENT_GAMES = 500
+PLAYER_NAMES = ["Player 1", "Player 2"]
+PLAYER_TYPES = ["Dummy", "Dummy"]
+PLAYER_DIFFICULTIES = [0, 0]
+# number of finished games which are written to the history journal at once
+HISTORY_BATCH_GAMES = 20
+HISTORY_FILE_LOC = "res/history.csv"
+
+worker_players = None
+worker_seed = None
+
+
+def type_switcher(player_type):
+    '''
+    player types which can play without any input (see main.type_switcher)
+    '''
+    return {
+        "AI": ai,
+        "Dummy": dummy
+    }[player_type]
+
+
+def create_players(names, player_types, difficulties, move_time=None):
+    '''
+    creates both players of the tournament, move_time replaces the time limit per move of ai players
+    '''
+    players = []
+    for num, (name, player_type, difficulty) in enumerate(zip(names, player_types, difficulties), 1):
+        player = type_switcher(player_type).Player(num, name, 0, difficulty)
+        if not move_time is None and isinstance(player, ai.Player):
+            player.time_limit = move_time
+        players.append(player)
+    return players
+
+
+def init_worker(names, player_types, difficulties, move_time, seed):
+    '''
+    creates the players of a worker process once, they are reused for all games of this worker
+    '''
+    global worker_players, worker_seed
+    worker_players = create_players(names, player_types, difficulties, move_time)
+    worker_seed = seed
+
+
+def play_game(game_num):
+    '''
+    plays a game between the players of this process, they change colors every game (player 1 is white in even games)
+    returns dictionary with result from the view of player 1, board history of the game and move times of both players
+    '''
+    if not worker_seed is None:
+        random.seed(worker_seed + game_num)
+    swapped = game_num % 2 == 1
+    players = worker_players[::-1] if swapped else worker_players
+
+    board = chess.Board()
+    turn_list = []
+    move_times = [[], []]
+    for player in players:
+        player.new_game()
+    while not board.is_game_over():
+        player_index = int(not board.turn)
+        start = time.perf_counter()
+        move = players[player_index].get_move(board)
+        move_times[player_index].append(time.perf_counter() - start)
+        board.push(move)
+        players[player_index].submit_move(move)
+        turn_list.append(board.fen().split(" ")[0])
+
+    victory_status = Tools.get_board_result(board)
+    return {
+        "game_num": game_num,
+        "victory_status": victory_status,
+        "result": -victory_status if swapped else victory_status,
+        "plies": len(board.move_stack),
+        "turn_list": turn_list,
+        "move_times": move_times[::-1] if swapped else move_times
+    }
+
+
+class TournamentStats:
+    '''
+    collects the results of a tournament from the view of player 1
+    '''
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.plies = 0
+        self.move_times = [[0, 0], [0, 0]]
+
+    def add_game(self, game):
+        if game["result"] == 1:
+            self.wins += 1
+        elif game["result"] == -1:
+            self.losses += 1
+        else:
+            self.draws += 1
+        self.plies += game["plies"]
+        for player_move_times, times in zip(self.move_times, game["move_times"]):
+            player_move_times[0] += sum(times)
+            player_move_times[1] += len(times)
+
+    def get_games(self):
+        return self.wins + self.draws + self.losses
+
+    def get_stats(self):
+        elapsed_time = time.perf_counter() - self.start
+        games = self.get_games()
+        return {
+            "games": games,
+            "time": elapsed_time,
+            "games_per_hour": games / elapsed_time * 3600 if elapsed_time > 0 else 0,
+            "wins": self.wins,
+            "draws": self.draws,
+            "losses": self.losses,
+            "avg_plies": self.plies / games if games > 0 else 0,
+            "avg_move_times": [move_time / moves if moves > 0 else 0 for move_time, moves in self.move_times]
+        }
+
+
+def run_tournament(args):
+    '''
+    plays all games of the tournament and writes them batch-wise to the history
+    returns the statistics of the tournament
+    '''
+    initargs = (args.player, args.player_type, args.player_difficulty, args.move_time, args.seed)
+    stats = TournamentStats()
+    pending_games = []
+    pool = None
+    if args.workers > 1:
+        pool = multiprocessing.Pool(args.workers, initializer=init_worker, initargs=initargs)
+        games = pool.imap_unordered(play_game, range(args.games))
+    else:
+        init_worker(*initargs)
+        games = map(play_game, range(args.games))
+
+    try:
+        for game in games:
+            stats.add_game(game)
+            print("{:>6} {:>8} {:>6}".format(stats.get_games(), {1: "1-0", -1: "0-1"}.get(game["victory_status"], "1/2-1/2"), game["plies"]))
+            if not args.no_history:
+                pending_games.append((game["turn_list"], game["victory_status"]))
+                if len(pending_games) >= args.history_batch:
+                    HistoryStore.append_games(pending_games, args.history)
+                    pending_games = []
+    finally:
+        if not pool is None:
+            pool.terminate()
+            pool.join()
+        if pending_games:
+            HistoryStore.append_games(pending_games, args.history)
+        if not args.no_history:
+            HistoryStore.compact_history(args.history)
+    return stats.get_stats()
+
+
+def print_stats(names, stats):
+    print("\n{} games in {:.1f} s ({:.0f} games/hour), {:.1f} plies per game".format(stats["games"], stats["time"], stats["games_per_hour"], stats["avg_plies"]))
+    print("{}: {} wins, {} draws, {} losses".format(names[0], stats["wins"], stats["draws"], stats["losses"]))
+    for name, avg_move_time in zip(names, stats["avg_move_times"]):
+        print("{}: {:.2f} ms per move".format(name, avg_move_time * 1000))
+
+
+def initialize_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--games", type=int, default=TOURNAMENT_GAMES, help="number of games")
+    parser.add_argument("-p", "--player", nargs=2, default=PLAYER_NAMES, help="names of player 1 and 2")
+    parser.add_argument("-pT", "--player_type", nargs=2, choices=["AI", "Dummy"], default=PLAYER_TYPES, help="types of player 1 and 2")
+    parser.add_argument("-pD", "--player_difficulty", nargs=2, type=int, choices=range(0, 4), default=PLAYER_DIFFICULTIES,
+        help="ai difficulties of player 1 and 2, use 0 if you are not using ai")
+    parser.add_argument("-w", "--workers", type=int, default=multiprocessing.cpu_count(), help="number of worker processes")
+    parser.add_argument("-t", "--move_time", type=float, help="time limit per move of ai players in seconds, by default set by difficulty")
+    parser.add_argument("--seed", type=int, help="seed of the random moves, every game gets its own seed derived from it")
+    parser.add_argument("--history", default=HISTORY_FILE_LOC, help="history file the games are written to")
+    parser.add_argument("--history_batch", type=int, default=HISTORY_BATCH_GAMES, help="number of games written to the history at once")
+    parser.add_argument("--no_history", action="store_true", help="do not write the games to the history")
+    return parser
+
+
+if __name__ == '__main__':
+    parser = initialize_parser()
+    args = parser.parse_args()
+    try:
+        stats = run_tournament(args)
+    except KeyboardInterrupt:
+        print("\nYou've quit the tournament.")
+    else:
+        print_stats(args.player, stats)
@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+# This file is part of the python-chess-ai.
+# Copyright (C) 2018 Lars Dittert <lars.dittert@de.ibm.com> and Pascal Schroeder <pascal.schroeder@de.ibm.com>
+#
+# This file provides the universal chess interface (UCI) of the ai, so it can be used by chess GUIs and tournament managers
+#
+import argparse
+import sys
+import threading
+import chess
+from player import ai
+
+ENGINE_NAME = "python-chess-ai"
+ENGINE_AUTHORS = "Lars Dittert, Pascal Schroeder"
+UCI_DIFFICULTY = 1
+# searches without depth limit (time, nodes or infinite) stop at this depth at the latest
+UCI_MAX_DEPTH = 64
+MIN_HASH_SIZE_MB = 1
+MAX_HASH_SIZE_MB = 4096
+MAX_THREADS = 64
+
+
+def get_score(value, pawn_value, pv):
+    '''
+    returns the uci score (centipawns or moves until mate) of a search value from the view of the side to move
+    '''
+    if value in (ai.MAX_BOARD_VALUE, -ai.MAX_BOARD_VALUE):
+        mate_moves = (max(1, len(pv)) + 1) // 2
+        return "mate {}".format(mate_moves if value > 0 else -mate_moves)
+    return "cp {}".format(int(round(value / pawn_value * 100)) if pawn_value else int(round(value)))
+
+
+class UciEngine:
+    '''
+    reads uci commands and answers them, the search runs on a background thread, so stop and isready are answered while searching
+    '''
+
+    def __init__(self, difficulty=UCI_DIFFICULTY, output=sys.stdout):
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.difficulty = difficulty
+        self.hash_size_mb = ai.TRANSPOSITION_TABLE_SIZE_MB
+        self.threads = 1
+        self.player = None
+        self.board = chess.Board()
+        self.search_thread = None
+        # go ponder: the search is not finished before ponderhit or stop, after ponderhit it gets the time budget of the go command
+        # go infinite: the search is not finished before stop, even if it has ended by itself
+        self.ponder_release = threading.Event()
+        self.ponder_budget = None
+        self.ponder_timer = None
+
+    def send(self, message):
+        with self.output_lock:
+            self.output.write(message + "\n")
+            self.output.flush()
+
+    def get_player(self):
+        '''
+        returns the player of the engine, it is created on first use with the current options
+        '''
+        if self.player is None:
+            self.player = ai.Player(1, ENGINE_NAME, 0, self.difficulty, hash_size_mb=self.hash_size_mb, smp_helpers=self.threads - 1)
+            self.player.info_callback = self.send_info
+        return self.player
+
+    def run(self, input_stream=sys.stdin):
+        '''
+        handles all commands of the input stream until quit or the end of the stream
+        '''
+        for line in input_stream:
+            if not self.handle_command(line.strip()):
+                break
+        self.stop_search()
+        if not self.player is None:
+            self.player.close()
+
+    def handle_command(self, line):
+        '''
+        handles a single command, unknown commands are ignored
+        returns False if the engine has to quit
+        '''
+        command, _, arguments = line.partition(" ")
+        if command == "quit":
+            return False
+        handler = {
+            "uci": self.handle_uci,
+            "isready": self.handle_isready,
+            "setoption": self.handle_setoption,
+            "ucinewgame": self.handle_ucinewgame,
+            "position": self.handle_position,
+            "go": self.handle_go,
+            "ponderhit": self.handle_ponderhit,
+            "stop": self.handle_stop
+        }.get(command)
+        if not handler is None:
+            handler(arguments.split())
+        return True
+
+    def handle_uci(self, arguments):
+        self.send("id name {}".format(ENGINE_NAME))
+        self.send("id author {}".format(ENGINE_AUTHORS))
+        self.send("option name Hash type spin default {} min {} max {}".format(ai.TRANSPOSITION_TABLE_SIZE_MB, MIN_HASH_SIZE_MB, MAX_HASH_SIZE_MB))
+        self.send("option name Threads type spin default 1 min 1 max {}".format(MAX_THREADS))
+        self.send("option name Ponder type check default false")
+        self.send("option name Difficulty type spin default {} min 1 max 3".format(UCI_DIFFICULTY))
+        self.send("uciok")
+
+    def handle_isready(self, arguments):
+        self.get_player()
+        self.send("readyok")
+
+    def handle_setoption(self, arguments):
+        '''
+        setoption name <name> value <value>, the options are applied to a running search with the next search
+        '''
+        if not "name" in arguments or not "value" in arguments:
+            return
+        name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")]).lower()
+        value = " ".join(arguments[arguments.index("value") + 1:])
+        if not value.isdigit():
+            return
+        value = int(value)
+        self.stop_search()
+        if name == "hash":
+            self.hash_size_mb = min(MAX_HASH_SIZE_MB, max(MIN_HASH_SIZE_MB, value))
+            if not self.player is None:
+                self.player.set_hash_size(self.hash_size_mb)
+        elif name == "threads":
+            self.threads = min(MAX_THREADS, max(1, value))
+            if not self.player is None:
+                self.player.set_smp_helpers(self.threads - 1)
+        elif name == "difficulty" and value in range(1, 4):
+            self.difficulty = value
+            if not self.player is None:
+                self.player.close()
+                self.player = None
+
+    def handle_ucinewgame(self, arguments):
+        self.stop_search()
+        self.board = chess.Board()
+        if not self.player is None:
+            self.player.new_game()
+
+    def handle_position(self, arguments):
+        '''
+        position [startpos | fen <fen>] [moves <move> ...]
+        '''
+        moves_index = arguments.index("moves") if "moves" in arguments else len(arguments)
+        try:
+            if arguments and arguments[0] == "fen":
+                board = chess.Board(" ".join(arguments[1:moves_index]))
+            else:
+                board = chess.Board()
+            for move in arguments[moves_index + 1:]:
+                board.push_uci(move)
+        except ValueError as error:
+            self.send("info string invalid position: {}".format(error))
+            return
+        self.stop_search()
+        self.board = board
+
+    def handle_go(self, arguments):
+        '''
+        go [ponder] [wtime <ms>] [btime <ms>] [winc <ms>] [binc <ms>] [movestogo <n>] [movetime <ms>] [depth <n>] [nodes <n>] [infinite]
+        without any limit the time per move of the difficulty is used
+        '''
+        self.stop_search()
+        limits = {}
+        for name, value in zip(arguments, arguments[1:]):
+            if name in ("wtime", "btime", "winc", "binc", "movestogo", "movetime", "depth", "nodes") and value.lstrip("-").isdigit():
+                limits[name] = int(value)
+
+        player = self.get_player()
+        player.stop_requested = False
+        player.max_depth = limits.get("depth", UCI_MAX_DEPTH)
+        player.max_nodes = limits.get("nodes")
+        player.time_manager.clear_game_clock()
+        clock = "wtime" if self.board.turn == chess.WHITE else "btime"
+        increment = "winc" if self.board.turn == chess.WHITE else "binc"
+        if "movetime" in limits:
+            player.time_limit = limits["movetime"] / 1000
+        elif clock in limits:
+            player.set_clock(max(0, limits[clock]) / 1000, limits.get(increment, 0) / 1000, limits.get("movestogo"))
+        elif "infinite" in arguments or "depth" in limits or "nodes" in limits:
+            player.time_limit = None
+        else:
+            player.time_limit = player.get_timeout_by_dif(self.difficulty)
+
+        self.ponder_release.clear()
+        self.ponder_budget = None
+        if "ponder" in arguments:
+            # the ponder search runs without time limit, the time budget is applied by ponderhit
+            player.time_manager.set_move_time(player.time_limit)
+            self.ponder_budget = player.time_manager.get_time_limits()[0]
+            player.time_manager.clear_game_clock()
+            player.time_limit = None
+        elif not "infinite" in arguments:
+            self.ponder_release.set()
+        if player.smp_helpers > 0:
+            # worker processes are forked by the main thread, forking from the search thread could copy locks held by other threads
+            player.get_search_pool()
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(),))
+        self.search_thread.start()
+
+    def search(self, board):
+        player = self.get_player()
+        move = None
+        if not board.is_game_over():
+            player.search_info = {}
+            move = player.get_move(board)
+            if not "pv" in player.search_info:
+                self.send("info string {} move".format("tablebase" if "tb_dtz_probes" in player.search_info else "book"))
+        self.ponder_release.wait()
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        pv = player.search_info.get("pv", [])
+        # the second move of the principal variation is the reply the gui may let the engine ponder on
+        if len(pv) > 1 and pv[0] == move.uci():
+            self.send("bestmove {} ponder {}".format(move.uci(), pv[1]))
+        else:
+            self.send("bestmove {}".format(move.uci()))
+
+    def send_info(self, search_info):
+        '''
+        sends the info line of a completed iteration of the search
+        '''
+        self.send("info depth {} score {} nodes {} nps {} time {} pv {}".format(search_info["depth"],
+            get_score(search_info["value"], self.player.pawn_value, search_info["pv"]), search_info["nodes"],
+            int(search_info["nps"]), int(search_info["time"] * 1000), " ".join(search_info["pv"])))
+
+    def handle_ponderhit(self, arguments):
+        '''
+        the opponent has played the pondered move: the running search goes on as normal search with the time budget of the go command
+        '''
+        if self.search_thread is None or self.ponder_release.is_set() or self.ponder_budget is None:
+            return
+        if self.ponder_budget != float('inf'):
+            self.ponder_timer = threading.Timer(self.ponder_budget, self.player.stop)
+            self.ponder_timer.start()
+        self.ponder_release.set()
+
+    def handle_stop(self, arguments):
+        self.stop_search()
+
+    def stop_search(self):
+        '''
+        stops a running search and waits until its best move has been sent
+        '''
+        if not self.search_thread is None:
+            self.player.stop()
+            self.ponder_release.set()
+            self.search_thread.join()
+            self.search_thread = None
+        if not self.ponder_timer is None:
+            self.ponder_timer.cancel()
+            self.ponder_timer = None
+
+
+def initialize_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--difficulty", type=int, choices=range(1, 4), default=UCI_DIFFICULTY, help="difficulty of the ai")
+    return parser
+
+
+if __name__ == '__main__':
+    parser = initialize_parser()
+    args = parser.parse_args()
+    try:
+        UciEngine(args.difficulty).run()
+    except KeyboardInterrupt:
+        pass